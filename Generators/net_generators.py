@@ -0,0 +1,161 @@
+import xml.etree.ElementTree as et
+from Task1_Parser.task1 import PetriNet
+
+
+def _build(places, transitions, arcs, marked):
+    return PetriNet.from_structure(places, transitions, arcs, set(marked))
+
+
+def dining_philosophers(n):
+    """n philosophers around a table, each with a fork to their right.
+
+    Philosopher i thinks, takes fork i (left), then fork i+1 (right), eats and
+    puts both back. The state where everyone holds their left fork is a deadlock.
+    """
+    places, transitions, arcs, marked = [], [], [], []
+    for i in range(n):
+        places += [f"think_{i}", f"has_left_{i}", f"eat_{i}", f"fork_{i}"]
+        marked += [f"think_{i}", f"fork_{i}"]
+    for i in range(n):
+        right = f"fork_{(i + 1) % n}"
+        transitions += [f"take_left_{i}", f"take_right_{i}", f"release_{i}"]
+        arcs += [
+            (f"think_{i}", f"take_left_{i}"), (f"fork_{i}", f"take_left_{i}"),
+            (f"take_left_{i}", f"has_left_{i}"),
+            (f"has_left_{i}", f"take_right_{i}"), (right, f"take_right_{i}"),
+            (f"take_right_{i}", f"eat_{i}"),
+            (f"eat_{i}", f"release_{i}"),
+            (f"release_{i}", f"think_{i}"), (f"release_{i}", f"fork_{i}"), (f"release_{i}", right),
+        ]
+    return _build(places, transitions, arcs, marked)
+
+
+def token_ring(n):
+    """n stations passing one token around a ring.
+
+    A station requests on its own, enters its critical section when it holds
+    the token, and passes the token on when it leaves or while it is idle.
+    """
+    places, transitions, arcs, marked = [], [], [], ["token_0"]
+    for i in range(n):
+        places += [f"idle_{i}", f"request_{i}", f"critical_{i}", f"token_{i}"]
+        marked.append(f"idle_{i}")
+    for i in range(n):
+        nxt = f"token_{(i + 1) % n}"
+        transitions += [f"ask_{i}", f"enter_{i}", f"leave_{i}", f"pass_{i}"]
+        arcs += [
+            (f"idle_{i}", f"ask_{i}"), (f"ask_{i}", f"request_{i}"),
+            (f"request_{i}", f"enter_{i}"), (f"token_{i}", f"enter_{i}"),
+            (f"enter_{i}", f"critical_{i}"),
+            (f"critical_{i}", f"leave_{i}"), (f"leave_{i}", f"idle_{i}"), (f"leave_{i}", nxt),
+            (f"idle_{i}", f"pass_{i}"), (f"token_{i}", f"pass_{i}"),
+            (f"pass_{i}", f"idle_{i}"), (f"pass_{i}", nxt),
+        ]
+    return _build(places, transitions, arcs, marked)
+
+
+def readers_writers(n):
+    """n processes sharing a resource: many readers or one writer at a time.
+
+    Each process owns a permit place; reading takes the own permit, writing
+    takes all n permits.
+    """
+    places, transitions, arcs, marked = [], [], [], []
+    for i in range(n):
+        places += [f"idle_{i}", f"reading_{i}", f"writing_{i}", f"permit_{i}"]
+        marked += [f"idle_{i}", f"permit_{i}"]
+    permits = [f"permit_{j}" for j in range(n)]
+    for i in range(n):
+        transitions += [f"start_read_{i}", f"end_read_{i}", f"start_write_{i}", f"end_write_{i}"]
+        arcs += [
+            (f"idle_{i}", f"start_read_{i}"), (f"permit_{i}", f"start_read_{i}"),
+            (f"start_read_{i}", f"reading_{i}"),
+            (f"reading_{i}", f"end_read_{i}"),
+            (f"end_read_{i}", f"idle_{i}"), (f"end_read_{i}", f"permit_{i}"),
+            (f"idle_{i}", f"start_write_{i}"), (f"start_write_{i}", f"writing_{i}"),
+            (f"writing_{i}", f"end_write_{i}"), (f"end_write_{i}", f"idle_{i}"),
+        ]
+        arcs += [(p, f"start_write_{i}") for p in permits]
+        arcs += [(f"end_write_{i}", p) for p in permits]
+    return _build(places, transitions, arcs, marked)
+
+
+def shared_mutex(n):
+    """n processes competing for one shared lock (idle -> waiting -> critical)."""
+    places, transitions, arcs, marked = ["lock"], [], [], ["lock"]
+    for i in range(n):
+        places += [f"idle_{i}", f"waiting_{i}", f"critical_{i}"]
+        marked.append(f"idle_{i}")
+    for i in range(n):
+        transitions += [f"request_{i}", f"enter_{i}", f"leave_{i}"]
+        arcs += [
+            (f"idle_{i}", f"request_{i}"), (f"request_{i}", f"waiting_{i}"),
+            (f"waiting_{i}", f"enter_{i}"), ("lock", f"enter_{i}"),
+            (f"enter_{i}", f"critical_{i}"),
+            (f"critical_{i}", f"leave_{i}"),
+            (f"leave_{i}", f"idle_{i}"), (f"leave_{i}", "lock"),
+        ]
+    return _build(places, transitions, arcs, marked)
+
+
+def philosophers_state_count(n):
+    # Pell-Lucas numbers: 2, 6, 14, 34, ... with a(n) = 2 a(n-1) + a(n-2).
+    previous, current = 2, 2
+    for _ in range(n - 1):
+        previous, current = current, 2 * current + previous
+    return current
+
+
+# family -> (generator, closed-form reachable state count)
+FAMILIES = {
+    "philosophers": (dining_philosophers, philosophers_state_count),
+    "token_ring": (token_ring, lambda n: 3 * n * 2 ** (n - 1)),
+    "readers_writers": (readers_writers, lambda n: 2 ** n + n),
+    "mutex": (shared_mutex, lambda n: (n + 2) * 2 ** (n - 1)),
+}
+
+
+def generate(family, n):
+    if family not in FAMILIES:
+        raise ValueError(f"Invalid family. Use {', '.join(repr(name) for name in FAMILIES)}")
+    return FAMILIES[family][0](n)
+
+
+def expected_state_count(family, n):
+    if family not in FAMILIES:
+        raise ValueError(f"Invalid family. Use {', '.join(repr(name) for name in FAMILIES)}")
+    return FAMILIES[family][1](n)
+
+
+def write_pnml(petri_net, path, net_id="net"):
+    """Write petri_net as a PNML P/T net that PetriNet(path) reads back unchanged.
+
+    Weights are not part of PNML: PetriNet(path) gives every place weight 1
+    unless a weight file is passed as well.
+    """
+    pnml = et.Element("pnml", xmlns="http://www.pnml.org/version-2009/grammar/pnml")
+    net = et.SubElement(
+        pnml, "net", id=net_id, type="http://www.pnml.org/version-2009/grammar/ptnet"
+    )
+    page = et.SubElement(net, "page", id="page0")
+
+    for p_idx, p in enumerate(petri_net.places):
+        place = et.SubElement(page, "place", id=p)
+        et.SubElement(et.SubElement(place, "name"), "text").text = p
+        if petri_net.initial_marking[p_idx]:
+            et.SubElement(et.SubElement(place, "initialMarking"), "text").text = "1"
+    for t in petri_net.transitions:
+        transition = et.SubElement(page, "transition", id=t)
+        et.SubElement(et.SubElement(transition, "name"), "text").text = t
+
+    arc_id = 0
+    for t_idx, t in enumerate(petri_net.transitions):
+        for p_idx in petri_net.transition_inputs(t_idx):
+            et.SubElement(page, "arc", id=f"a{arc_id}", source=petri_net.places[p_idx], target=t)
+            arc_id += 1
+        for p_idx in petri_net.transition_outputs(t_idx):
+            et.SubElement(page, "arc", id=f"a{arc_id}", source=t, target=petri_net.places[p_idx])
+            arc_id += 1
+
+    et.indent(pnml)
+    et.ElementTree(pnml).write(path, encoding="utf-8", xml_declaration=True)
@@ -1,101 +1,452 @@
+import hashlib
+import json
+import os
 import xml.etree.ElementTree as et
 import numpy as np
 
+# Compiled net file: magic, header length (little-endian uint64), JSON header,
+# then every array at a COMPILED_ALIGN-byte aligned offset given in the header.
+COMPILED_MAGIC = b"PNETC001"
+COMPILED_ALIGN = 64
+COMPILED_ARRAYS = (
+    "initial_marking", "c", "pre_indptr", "pre_indices", "post_indptr", "post_indices"
+)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
 class PetriNet:
     def __init__(self, pnml_file_path, weight_file_path=None):
+        self._init_fields()
+        self.pnml_file_path = pnml_file_path
+
+        self.read_pnml_file(pnml_file_path)
+        self.read_weight(weight_file_path)
+
+    def _init_fields(self):
+        self.pnml_file_path = None      # Source PNML, hashed by save_compiled
         self.places = []                # List of Place IDs(string)
         self.transitions = []           # List of Transition IDs(string)
         self.initial_marking = None     # Initial marking vector (NumPy array)
-        self.pre_matrix = None          # Input matrix (NumPy matrix)
-        self.post_matrix = None         # Output matrix (NumPy matrix)
+
+        # Arcs in compressed sparse column form: the input places of transition t
+        # are pre_indices[pre_indptr[t]:pre_indptr[t + 1]], likewise for outputs.
+        self.pre_indptr = None
+        self.pre_indices = None
+        self.post_indptr = None
+        self.post_indices = None
+        self._pre_dense = None          # Dense matrices, built on first access
+        self._post_dense = None
 
         self.place_to_index = {}        # Map: Place ID -> index
         self.transition_to_index = {}   # Map: Transition ID -> index
 
         self.c = None                   # Weight of places (NumPy array) for TASK 5
 
+        self.place_to_transitions = []  # Map: place index -> transitions consuming from it
+        self.place_to_producers = []    # Map: place index -> transitions producing into it
+
         self.num_places = 0
         self.num_transitions = 0
 
-        self.read_pnml_file(pnml_file_path)
-        self.read_weight(weight_file_path)
-        
+    def save_compiled(self, path):
+        """Write the parsed net to a memory-mappable file for load_compiled.
+
+        The header stores the IDs, the SHA-256 of the source PNML and the dtype,
+        shape and offset of each array; the arrays follow as raw buffers.
+        """
+        arrays = {
+            name: np.ascontiguousarray(getattr(self, name))
+            for name in COMPILED_ARRAYS
+            if getattr(self, name) is not None
+        }
+        header = {
+            "source_sha256": file_sha256(self.pnml_file_path) if self.pnml_file_path else None,
+            "places": self.places,
+            "transitions": self.transitions,
+            "arrays": {},
+        }
+
+        # Offsets depend on the header length, which depends on the offsets:
+        # lay out again until the header fits in the space reserved for it.
+        header_size = 0
+        while True:
+            offset = len(COMPILED_MAGIC) + 8 + header_size
+            for name, array in arrays.items():
+                offset = -(-offset // COMPILED_ALIGN) * COMPILED_ALIGN
+                header["arrays"][name] = {
+                    "dtype": array.dtype.str,
+                    "shape": list(array.shape),
+                    "offset": offset,
+                }
+                offset += array.nbytes
+            encoded = json.dumps(header).encode()
+            if len(encoded) <= header_size:
+                break
+            header_size = len(encoded)
+        # Pad the header so the offsets computed above stay valid.
+        encoded = encoded.ljust(header_size)
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(COMPILED_MAGIC)
+            f.write(len(encoded).to_bytes(8, "little"))
+            f.write(encoded)
+            for name, array in arrays.items():
+                offset = header["arrays"][name]["offset"]
+                f.write(b"\0" * (offset - f.tell()))
+                assert f.tell() == offset, f"Compiled layout is off for {name}"
+                f.write(array.tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load_compiled(cls, path, pnml_file_path=None, weight_file_path=None):
+        """Load a net written by save_compiled without parsing any XML.
+
+        Arrays are read-only views into a memory map of the file. When
+        pnml_file_path is given its SHA-256 must match the one recorded at
+        compile time, otherwise ValueError is raised. weight_file_path, if
+        given, replaces the stored weights c.
+        """
+        buffer = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(buffer[:len(COMPILED_MAGIC)]) != COMPILED_MAGIC:
+            raise ValueError(f"Not a compiled Petri net: {path}")
+        start = len(COMPILED_MAGIC) + 8
+        header_size = int.from_bytes(bytes(buffer[len(COMPILED_MAGIC):start]), "little")
+        header = json.loads(bytes(buffer[start:start + header_size]))
+
+        if pnml_file_path is not None and file_sha256(pnml_file_path) != header["source_sha256"]:
+            raise ValueError(f"Compiled net {path} is out of date for {pnml_file_path}")
+
+        net = cls.__new__(cls)
+        net._init_fields()
+        net.pnml_file_path = pnml_file_path
+        net.places = header["places"]
+        net.transitions = header["transitions"]
+        net.num_places = len(net.places)
+        net.num_transitions = len(net.transitions)
+        net.place_to_index = {p: i for i, p in enumerate(net.places)}
+        net.transition_to_index = {t: i for i, t in enumerate(net.transitions)}
+
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"]))
+            array = np.frombuffer(buffer, dtype=dtype, count=count, offset=spec["offset"])
+            setattr(net, name, array.reshape(spec["shape"]))
+
+        net.build_dependency_index()
+        if weight_file_path is not None:
+            net.read_weight(weight_file_path)
+        return net
+
+    @property
+    def pre_matrix(self):
+        # Input matrix (num_places x num_transitions), materialized on demand.
+        if self._pre_dense is None and self.pre_indptr is not None:
+            self._pre_dense = self._dense(self.pre_indptr, self.pre_indices)
+        return self._pre_dense
+
+    @pre_matrix.setter
+    def pre_matrix(self, matrix):
+        self._pre_dense = matrix
+        if matrix is not None:
+            self.pre_indptr, self.pre_indices = self._sparse(matrix)
+
+    @property
+    def post_matrix(self):
+        # Output matrix (num_places x num_transitions), materialized on demand.
+        if self._post_dense is None and self.post_indptr is not None:
+            self._post_dense = self._dense(self.post_indptr, self.post_indices)
+        return self._post_dense
+
+    @post_matrix.setter
+    def post_matrix(self, matrix):
+        self._post_dense = matrix
+        if matrix is not None:
+            self.post_indptr, self.post_indices = self._sparse(matrix)
+
+    def _dense(self, indptr, indices):
+        matrix = np.zeros((self.num_places, self.num_transitions), dtype=int)
+        columns = np.repeat(np.arange(self.num_transitions), np.diff(indptr))
+        matrix[indices, columns] = 1
+        return matrix
+
+    @staticmethod
+    def _sparse(matrix):
+        rows, columns = np.nonzero(np.asarray(matrix).T)
+        indptr = np.zeros(matrix.shape[1] + 1, dtype=np.int32)
+        np.cumsum(np.bincount(rows, minlength=matrix.shape[1]), out=indptr[1:])
+        return indptr, columns.astype(np.int32)
+
+    @staticmethod
+    def _arcs_to_sparse(transition_idx, place_idx, num_transitions):
+        # Sort arcs by transition, then place, and drop duplicates.
+        if len(transition_idx):
+            keys = np.unique(transition_idx.astype(np.int64) << 32 | place_idx)
+            transition_idx, place_idx = keys >> 32, keys & 0xFFFFFFFF
+        indptr = np.zeros(num_transitions + 1, dtype=np.int32)
+        np.cumsum(np.bincount(transition_idx, minlength=num_transitions), out=indptr[1:])
+        return indptr, np.asarray(place_idx, dtype=np.int32)
+
+    def transition_inputs(self, t_idx):
+        return self.pre_indices[self.pre_indptr[t_idx]:self.pre_indptr[t_idx + 1]]
+
+    def transition_outputs(self, t_idx):
+        return self.post_indices[self.post_indptr[t_idx]:self.post_indptr[t_idx + 1]]
+
+    @staticmethod
+    def segment_any(values, indptr):
+        # any() over each CSC segment values[..., indptr[t]:indptr[t + 1]];
+        # empty segments are False.
+        nonempty = np.diff(indptr) > 0
+        result = np.zeros(values.shape[:-1] + (len(nonempty),), dtype=bool)
+        if nonempty.any():
+            starts = indptr[:-1][nonempty].astype(np.intp)
+            result[..., nonempty] = np.logical_or.reduceat(values, starts, axis=-1)
+        return result
+
+    def disabled_transitions(self, rows):
+        """(markings x transitions) mask, True where t has an unmarked input place."""
+        rows = np.atleast_2d(rows)
+        return self.segment_any(rows[:, self.pre_indices] == 0, self.pre_indptr)
+
     def read_pnml_file(self, file_path: str):
         try:
+            # One streaming pass over the first <net>: places, transitions and arcs
+            # are handled when their end tag is read and cleared right after.
+            # They all end before their <net> does, so the pass stops there.
+            M0 = []
+            arcs = []
+            local_names = {}
+            found_net = False
             try:
-                tree = et.parse(file_path)
-                root = tree.getroot()
+                for _, elem in et.iterparse(file_path):
+                    tag = local_names.get(elem.tag)
+                    if tag is None:
+                        tag = local_names.setdefault(elem.tag, elem.tag.rsplit('}', 1)[-1])
+
+                    if tag == "place":
+                        pid = elem.attrib.get("id")
+                        if pid:
+                            self.places.append(pid)
+
+                            marking = 0
+                            text_node = elem.find("{*}initialMarking/{*}text")
+                            if text_node is not None and text_node.text:
+                                marking = int(text_node.text.strip())
+                            if marking > 1 or marking < 0:
+                                raise ValueError("Invalid initial marking")
+                            M0.append(marking)
+                        elem.clear()
+                    elif tag == "transition":
+                        tid = elem.attrib.get("id")
+                        if tid:
+                            self.transitions.append(tid)
+                        elem.clear()
+                    elif tag == "arc":
+                        arcs.append((elem.attrib.get("source"), elem.attrib.get("target")))
+                        elem.clear()
+                    elif tag == "net":
+                        found_net = True
+                        break
             except FileNotFoundError:
                 print(f"[Error] File not found at path: {file_path}")
-                return 
+                return
             except et.ParseError as e:
                 print(f"[Error] PNML file has invalid XML structure: {e}")
                 return
 
-            net = root.find(".//{*}net")
-            if net is None:
+            if not found_net:
                 raise ValueError("PNML file does not contain a <net> element.")
 
-            M0 = []
-
-            for place in net.iter():
-                if 'place' in place.tag:
-                    pid = place.attrib.get("id") 
-                    if not pid: continue
-
-                    self.places.append(pid)
-
-                    marking = 0
-                    for child in place:
-                        if 'initialMarking' in child.tag:
-                            text_node = child.find("{*}text")
-                            if text_node is not None and text_node.text:
-                                marking = int(text_node.text.strip())
-                            break
-                    if marking > 1 or marking < 0:
-                        raise ValueError("Invalid initial marking")
-                    M0.append(marking)
-
-            for trans in net.iter():
-                if 'transition' in trans.tag:
-                    tid = trans.attrib.get("id")
-                    if not tid: continue
-                    self.transitions.append(tid)
-
-            self.num_places = len(self.places)
-            self.num_transitions = len(self.transitions)
-            self.place_to_index = {p: i for i, p in enumerate(self.places)}
-            self.transition_to_index = {t: i for i, t in enumerate(self.transitions)}
-
-            self.initial_marking = np.array(M0)
-            self.pre_matrix = np.zeros((self.num_places, self.num_transitions), dtype=int)
-            self.post_matrix = np.zeros((self.num_places, self.num_transitions), dtype=int)
-
-            if self.num_places == 0:
-                    raise ValueError("No Places found in the file.")
-            
-            for arc in net.iter():
-                if 'arc' in arc.tag:
-                    source = arc.attrib.get("source")
-                    target = arc.attrib.get("target")
-
-                    if source in self.place_to_index and target in self.transition_to_index:
-                        p_idx = self.place_to_index[source]
-                        t_idx = self.transition_to_index[target]
-                        self.pre_matrix[p_idx, t_idx] = 1
-
-                    elif source in self.transition_to_index and target in self.place_to_index:
-                        t_idx = self.transition_to_index[source]
-                        p_idx = self.place_to_index[target]
-                        self.post_matrix[p_idx, t_idx] = 1
-                    else:
-                        raise ValueError("Invalid arc")
+            self._build_structure(M0, arcs)
         except ValueError as ve:
             print(f"[Data Error] {ve}")
         except Exception as e:
             print(f"[Unexpected Error] An unexpected error occurred: {e}")
-            
+
+    def _build_structure(self, M0, arcs):
+        # Shared by the PNML loader and from_structure: index the IDs and turn
+        # (source, target) arcs into the sparse pre/post arrays.
+        self.num_places = len(self.places)
+        self.num_transitions = len(self.transitions)
+        self.place_to_index = {p: i for i, p in enumerate(self.places)}
+        self.transition_to_index = {t: i for i, t in enumerate(self.transitions)}
+
+        self.initial_marking = np.array(M0)
+
+        if self.num_places == 0:
+                raise ValueError("No Places found in the file.")
+
+        pre_t, pre_p, post_t, post_p = [], [], [], []
+        for source, target in arcs:
+            if source in self.place_to_index and target in self.transition_to_index:
+                pre_t.append(self.transition_to_index[target])
+                pre_p.append(self.place_to_index[source])
+            elif source in self.transition_to_index and target in self.place_to_index:
+                post_t.append(self.transition_to_index[source])
+                post_p.append(self.place_to_index[target])
+            else:
+                raise ValueError("Invalid arc")
+
+        self.pre_indptr, self.pre_indices = self._arcs_to_sparse(
+            np.array(pre_t, dtype=np.int64), np.array(pre_p, dtype=np.int64), self.num_transitions
+        )
+        self.post_indptr, self.post_indices = self._arcs_to_sparse(
+            np.array(post_t, dtype=np.int64), np.array(post_p, dtype=np.int64), self.num_transitions
+        )
+
+        self.build_dependency_index()
+
+    @classmethod
+    def from_structure(cls, places, transitions, arcs, initial_marking, weights=None):
+        """Build a net in memory from IDs, (source, target) arcs and a 0/1 marking.
+
+        initial_marking is a sequence aligned with places or a set of the marked
+        place IDs; weights default to 1 per place. Raises ValueError on
+        an arc between unknown nodes or a marking outside {0, 1}.
+        """
+        net = cls.__new__(cls)
+        net._init_fields()
+        net.places = list(places)
+        net.transitions = list(transitions)
+
+        if isinstance(initial_marking, (set, frozenset)):
+            M0 = [int(p in initial_marking) for p in net.places]
+        else:
+            M0 = [int(m) for m in initial_marking]
+        if len(M0) != len(net.places) or any(m not in (0, 1) for m in M0):
+            raise ValueError("Invalid initial marking")
+
+        net._build_structure(M0, arcs)
+        net.c = np.ones(net.num_places, dtype=int) if weights is None else np.array(weights)
+        return net
+
+    def build_dependency_index(self):
+        # Only a change on an input place can flip a transition's enabledness.
+        self.place_to_transitions = self._place_lists(self.pre_indptr, self.pre_indices)
+        self.place_to_producers = self._place_lists(self.post_indptr, self.post_indices)
+
+    def _place_lists(self, indptr, indices):
+        # Transpose a CSC arc array into per-place transition lists (CSR).
+        columns = np.repeat(np.arange(self.num_transitions), np.diff(indptr))
+        order = np.argsort(indices, kind="stable")
+        bounds = np.searchsorted(indices[order], np.arange(self.num_places + 1))
+        sorted_columns = columns[order]
+        return [
+            sorted_columns[bounds[p_idx]:bounds[p_idx + 1]].tolist()
+            for p_idx in range(self.num_places)
+        ]
+
+    def _transition_supports(self):
+        return [
+            np.union1d(self.transition_inputs(t), self.transition_outputs(t)).tolist()
+            for t in range(self.num_transitions)
+        ]
+
+    def compute_place_order(self, method="file", iterations=20):
+        """Return place indices in the order their BDD variables should be declared.
+
+        "file" keeps PNML order, "dfs" follows arcs from the initially marked places,
+        "force" runs the FORCE hypergraph heuristic with transitions as hyperedges,
+        and "bandwidth" is reverse Cuthill-McKee on the place adjacency graph.
+        """
+        if method == "file":
+            return list(range(self.num_places))
+        if method == "dfs":
+            return self._dfs_place_order()
+        if method == "force":
+            return self._force_place_order(iterations)
+        if method == "bandwidth":
+            return self._bandwidth_place_order()
+        raise ValueError("Invalid ordering. Use 'file', 'dfs', 'force' or 'bandwidth'")
+
+    def _dfs_place_order(self):
+        successors = [[] for _ in range(self.num_places)]
+        for t in range(self.num_transitions):
+            outputs = self.transition_outputs(t).tolist()
+            for p_idx in self.transition_inputs(t):
+                successors[p_idx].extend(outputs)
+
+        marked = [p_idx for p_idx in range(self.num_places) if self.initial_marking[p_idx]]
+        unmarked = [p_idx for p_idx in range(self.num_places) if not self.initial_marking[p_idx]]
+
+        order = []
+        visited = set()
+        for root in marked + unmarked:
+            stack = [root]
+            while stack:
+                p_idx = stack.pop()
+                if p_idx in visited:
+                    continue
+                visited.add(p_idx)
+                order.append(p_idx)
+                stack.extend(reversed(successors[p_idx]))
+        return order
+
+    def _force_place_order(self, iterations):
+        edges = [support for support in self._transition_supports() if len(support) > 1]
+        position = np.arange(self.num_places, dtype=float)
+
+        def total_span(pos):
+            return sum(pos[e].max() - pos[e].min() for e in edges)
+
+        best_order = list(range(self.num_places))
+        best_span = total_span(position)
+        for _ in range(iterations):
+            # Move every place to the mean centre of gravity of its transitions.
+            total = np.zeros(self.num_places)
+            count = np.zeros(self.num_places)
+            for e in edges:
+                total[e] += position[e].mean()
+                count[e] += 1
+            target = np.where(count > 0, total / np.maximum(count, 1), position)
+
+            order = np.argsort(target, kind="stable")
+            position[order] = np.arange(self.num_places)
+            span = total_span(position)
+            if span >= best_span:
+                break
+            best_order, best_span = order.tolist(), span
+        return best_order
+
+    def _bandwidth_place_order(self):
+        neighbours = [set() for _ in range(self.num_places)]
+        for support in self._transition_supports():
+            for p_idx in support:
+                neighbours[p_idx].update(support)
+        for p_idx in range(self.num_places):
+            neighbours[p_idx].discard(p_idx)
+        degree = [len(n) for n in neighbours]
+
+        order = []
+        visited = set()
+        for root in sorted(range(self.num_places), key=lambda p_idx: degree[p_idx]):
+            if root in visited:
+                continue
+            visited.add(root)
+            queue = [root]
+            head = 0
+            while head < len(queue):
+                p_idx = queue[head]
+                head += 1
+                for q_idx in sorted(neighbours[p_idx] - visited, key=lambda q: degree[q]):
+                    visited.add(q_idx)
+                    queue.append(q_idx)
+            order.extend(queue)
+        return order[::-1]
+
     def read_weight(self, weight_file_path):
+        if weight_file_path is None:
+            # No weight file: every place weighs 1, as for missing entries below.
+            self.c = np.ones(self.num_places, dtype=int)
+            return
         try:
             with open(weight_file_path, 'r') as f:
                 content = f.read().split()
@@ -1,79 +1,825 @@
 import numpy as np
 from collections import deque
+import hashlib
+import math
+import mmap
+import multiprocessing as mp
+import os
+import queue
+import tempfile
 import time
+import zlib
 from Task1_Parser.task1 import PetriNet
+from Telemetry.telemetry import Telemetry, TelemetryAbort
+
+
+def _marking_owner(m, num_bytes, num_workers):
+    # crc32 is stable across processes, unlike hash() on bytes.
+    return zlib.crc32(m.to_bytes(num_bytes, "little")) % num_workers
+
+
+def _partition_worker(worker_id, masks, num_bytes, inboxes, commands, reports):
+    num_workers = len(inboxes)
+    inbox = inboxes[worker_id]
+    visited = set()
+    # Batches are tagged with their BFS level: each sender has its own feeder
+    # thread, so a batch for the next level can overtake one for this level.
+    early = {}
+    level = 0
+
+    while True:
+        batches = early.pop(level, [])
+        while len(batches) < num_workers:
+            batch_level, batch = inbox.get()
+            if batch_level == level:
+                batches.append(batch)
+            else:
+                early.setdefault(batch_level, []).append(batch)
+        candidates = set()
+        for batch in batches:
+            candidates.update(batch)
+
+        new_states = candidates - visited
+        visited |= new_states
+
+        outgoing = [[] for _ in range(num_workers)]
+        error = None
+        for m in new_states:
+            for pre_mask, consume_mask, post_mask in masks:
+                if m & pre_mask != pre_mask:
+                    continue
+                m_rest = m & consume_mask
+                if m_rest & post_mask:
+                    error = "Net is not 1-safe, use engine='numpy'"
+                    break
+                m_new = m_rest | post_mask
+                outgoing[_marking_owner(m_new, num_bytes, num_workers)].append(m_new)
+
+        level += 1
+        for target, batch in zip(inboxes, outgoing):
+            target.put((level, batch))
+        reports.put((worker_id, len(new_states), error))
+
+        if commands[worker_id].get() == "stop":
+            reports.put((worker_id, list(visited), None))
+            return
+
+
+class DiskVisitedSet:
+    """Open-addressing hash set of bit-packed markings stored in a memory-mapped file."""
+
+    def __init__(self, num_places, path=None, capacity=1 << 16, max_load=0.7):
+        self.num_places = num_places
+        # One extra sentinel bit so that a used slot is never all zeros.
+        self.row_bytes = (num_places + 1 + 7) // 8
+        self.max_load = max_load
+        self.path = path
+        self._owns_file = path is None
+        if self.path is None:
+            fd, self.path = tempfile.mkstemp(suffix=".visited")
+            os.close(fd)
+        self._count = 0
+        # Probing masks with capacity - 1, so the table size must be a power of two.
+        capacity = 1 << max(capacity - 1, 1).bit_length()
+        self._file, self._table = self._create_table(self.path, capacity)
+        self.capacity = capacity
+
+    def _create_table(self, path, capacity):
+        with open(path, "wb") as f:
+            f.truncate(capacity * self.row_bytes)
+        table_file = open(path, "r+b")
+        return table_file, mmap.mmap(table_file.fileno(), 0)
+
+    def _key(self, code):
+        return (code | (1 << self.num_places)).to_bytes(self.row_bytes, "little")
+
+    def _probe(self, table, capacity, key):
+        row = self.row_bytes
+        empty = bytes(row)
+        slot = zlib.crc32(key) & (capacity - 1)
+        while True:
+            offset = slot * row
+            current = table[offset:offset + row]
+            if current == key:
+                return offset, True
+            if current == empty:
+                return offset, False
+            slot = (slot + 1) & (capacity - 1)
+
+    def _grow(self):
+        new_capacity = self.capacity * 2
+        new_path = self.path + ".grow"
+        new_file, new_table = self._create_table(new_path, new_capacity)
+
+        row = self.row_bytes
+        empty = bytes(row)
+        for offset in range(0, self.capacity * row, row):
+            key = self._table[offset:offset + row]
+            if key != empty:
+                new_offset, _ = self._probe(new_table, new_capacity, key)
+                new_table[new_offset:new_offset + row] = key
+
+        self._table.close()
+        self._file.close()
+        os.replace(new_path, self.path)
+        self._file, self._table, self.capacity = new_file, new_table, new_capacity
+
+    def add(self, code):
+        if self._count + 1 > self.capacity * self.max_load:
+            self._grow()
+        key = self._key(code)
+        offset, found = self._probe(self._table, self.capacity, key)
+        if not found:
+            self._table[offset:offset + self.row_bytes] = key
+            self._count += 1
+        return not found
+
+    def __contains__(self, code):
+        return self._probe(self._table, self.capacity, self._key(code))[1]
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        self._table.close()
+        self._file.close()
+        if self._owns_file and os.path.exists(self.path):
+            os.remove(self.path)
 
 
 class ExplicitTraverse:
-    def __init__(self, petri_net: PetriNet):
+    def __init__(self, petri_net: PetriNet, telemetry: Telemetry = None):
         self.petri_net = petri_net
+        self.telemetry = telemetry
+        self._transition_masks = None
+        self._affected_transitions = None
+        self.stubborn_seeds = 8         # Enabled transitions tried as stubborn-set seeds
+
+    def _get_transition_masks(self):
+        # One Python int per marking: bit i is set when place i holds a token.
+        if self._transition_masks is None:
+            full_mask = (1 << self.petri_net.num_places) - 1
+            masks = []
+            for t in range(self.petri_net.num_transitions):
+                pre_mask = self._places_mask(self.petri_net.transition_inputs(t))
+                post_mask = self._places_mask(self.petri_net.transition_outputs(t))
+                consume_mask = full_mask ^ pre_mask
+                masks.append((pre_mask, consume_mask, post_mask))
+            self._transition_masks = masks
+        return self._transition_masks
+
+    def _get_affected_transitions(self):
+        # Transitions whose enabledness has to be re-checked after firing t.
+        if self._affected_transitions is None:
+            affected = []
+            for t in range(self.petri_net.num_transitions):
+                changed = set(self.petri_net.transition_inputs(t).tolist()) ^ set(
+                    self.petri_net.transition_outputs(t).tolist()
+                )
+                dependents = set()
+                for p_idx in changed:
+                    dependents.update(self.petri_net.place_to_transitions[p_idx])
+                affected.append(sorted(dependents))
+            self._affected_transitions = affected
+        return self._affected_transitions
+
+    def _places_mask(self, place_indices):
+        code = 0
+        for i in place_indices:
+            code |= 1 << int(i)
+        return code
+
+    def encode_marking(self, marking):
+        return self._places_mask(np.flatnonzero(marking))
 
-    def compute_reachable_markings(self, method="bfs", timeout=20.0):
+    def decode_marking(self, code):
+        marking = np.zeros(self.petri_net.num_places, dtype=int)
+        i = 0
+        while code:
+            if code & 1:
+                marking[i] = 1
+            code >>= 1
+            i += 1
+        return marking
+
+    def compute_reachable_markings(self, method="bfs", timeout=20.0, engine="numpy", workers=None):
         try:
             start_time = time.time()
 
             if method.lower() not in ["bfs", "dfs"]:
                 raise ValueError("Invalid method. Use 'bfs' or 'dfs'")
+            if self.telemetry is not None:
+                self.telemetry.start("explicit")
+
+            if engine == "numpy":
+                return self._numpy_reachable_markings(method, timeout, start_time)
+            elif engine == "bitmask":
+                return self._bitmask_reachable_markings(method, timeout, start_time)
+            elif engine == "stubborn":
+                return self._stubborn_reachable_markings(method, timeout, start_time)
+            elif engine == "incremental":
+                return self._incremental_reachable_markings(method, timeout, start_time)
+            elif engine == "vectorized":
+                if method.lower() != "bfs":
+                    raise ValueError("Engine 'vectorized' only supports method 'bfs'")
+                return self._vectorized_reachable_markings(timeout, start_time)
+            elif engine == "parallel":
+                if method.lower() != "bfs":
+                    raise ValueError("Engine 'parallel' only supports method 'bfs'")
+                return self._parallel_reachable_markings(timeout, start_time, workers)
+            else:
+                raise ValueError(
+                    "Invalid engine. Use 'numpy', 'bitmask', 'incremental', "
+                    "'stubborn', 'vectorized' or 'parallel'"
+                )
 
-            dq = deque([self.petri_net.initial_marking])
-            visited = {tuple(self.petri_net.initial_marking)}
+        except TelemetryAbort:
+            raise
+        except Exception as e:
+            print(f"[Error] {e}")
+            return [], 0
 
-            marking_states = [self.petri_net.initial_marking]
+    def _emit_step(self, engine, expanded, frontier, visited):
+        self.telemetry.emit(engine=engine, expanded=expanded, frontier=frontier, visited=visited)
 
-            while dq:
-                if time.time() - start_time > timeout:
-                    return -1, time.time() - start_time
+    def _numpy_reachable_markings(self, method, timeout, start_time):
+        dq = deque([self.petri_net.initial_marking])
+        visited = {tuple(self.petri_net.initial_marking)}
 
-                if method.lower() == "bfs":
-                    m = dq.popleft()
+        marking_states = [self.petri_net.initial_marking]
+
+        telemetry = self.telemetry
+        expanded = 0
+
+        while dq:
+            if time.time() - start_time > timeout:
+                return -1, time.time() - start_time
+            if telemetry is not None and expanded % telemetry.interval == 0:
+                self._emit_step("numpy", expanded, len(dq), len(visited))
+            expanded += 1
+
+            if method.lower() == "bfs":
+                m = dq.popleft()
+            else:
+                m = dq.pop()
+
+            enabled_t = [
+                t
+                for t in range(self.petri_net.num_transitions)
+                if np.all(m >= self.petri_net.pre_matrix[:, t])
+            ]
+
+            for t in enabled_t:
+                m_new = (
+                    m
+                    - self.petri_net.pre_matrix[:, t]
+                    + self.petri_net.post_matrix[:, t]
+                )
+                m_new_tuple = tuple(m_new)
+
+                if m_new_tuple not in visited:
+                    visited.add(m_new_tuple)
+                    dq.append(m_new)
+                    marking_states.append(m_new)
+
+        elapsed_time = time.time() - start_time
+        return marking_states, elapsed_time
+
+    def _bitmask_reachable_markings(self, method, timeout, start_time):
+        masks = self._get_transition_masks()
+
+        m0 = self.encode_marking(self.petri_net.initial_marking)
+        dq = deque([m0])
+        visited = {m0}
+
+        marking_states = [m0]
+        pop = dq.popleft if method.lower() == "bfs" else dq.pop
+
+        telemetry = self.telemetry
+        expanded = 0
+
+        while dq:
+            if time.time() - start_time > timeout:
+                return -1, time.time() - start_time
+            if telemetry is not None and expanded % telemetry.interval == 0:
+                self._emit_step("bitmask", expanded, len(dq), len(visited))
+            expanded += 1
+
+            m = pop()
+
+            for pre_mask, consume_mask, post_mask in masks:
+                if m & pre_mask != pre_mask:
+                    continue
+
+                m_rest = m & consume_mask
+                if m_rest & post_mask:
+                    raise ValueError("Net is not 1-safe, use engine='numpy'")
+                m_new = m_rest | post_mask
+
+                if m_new not in visited:
+                    visited.add(m_new)
+                    dq.append(m_new)
+                    marking_states.append(m_new)
+
+        elapsed_time = time.time() - start_time
+        return marking_states, elapsed_time
+
+    def _incremental_reachable_markings(self, method, timeout, start_time):
+        masks = self._get_transition_masks()
+        affected = [
+            [(masks[t_dep][0], 1 << t_dep) for t_dep in dependents]
+            for dependents in self._get_affected_transitions()
+        ]
+
+        m0 = self.encode_marking(self.petri_net.initial_marking)
+        enabled0 = 0
+        for t, (pre_mask, _, _) in enumerate(masks):
+            if m0 & pre_mask == pre_mask:
+                enabled0 |= 1 << t
+
+        # Each queued marking carries its enabled set (bit t = transition t enabled).
+        dq = deque([(m0, enabled0)])
+        visited = {m0}
+
+        marking_states = [m0]
+        pop = dq.popleft if method.lower() == "bfs" else dq.pop
+
+        telemetry = self.telemetry
+        expanded = 0
+
+        while dq:
+            if time.time() - start_time > timeout:
+                return -1, time.time() - start_time
+            if telemetry is not None and expanded % telemetry.interval == 0:
+                self._emit_step("incremental", expanded, len(dq), len(visited))
+            expanded += 1
+
+            m, enabled = pop()
+
+            pending = enabled
+            while pending:
+                low_bit = pending & -pending
+                pending ^= low_bit
+                t = low_bit.bit_length() - 1
+
+                _, consume_mask, post_mask = masks[t]
+                m_rest = m & consume_mask
+                if m_rest & post_mask:
+                    raise ValueError("Net is not 1-safe, use engine='numpy'")
+                m_new = m_rest | post_mask
+
+                if m_new in visited:
+                    continue
+
+                enabled_new = enabled
+                for pre_mask, t_bit in affected[t]:
+                    if m_new & pre_mask == pre_mask:
+                        enabled_new |= t_bit
+                    elif enabled_new & t_bit:
+                        enabled_new ^= t_bit
+
+                visited.add(m_new)
+                dq.append((m_new, enabled_new))
+                marking_states.append(m_new)
+
+        elapsed_time = time.time() - start_time
+        return marking_states, elapsed_time
+
+    def _stubborn_set(self, m, enabled, enabled_mask, masks, input_places, conflicts, producers):
+        # Deadlock-preserving stubborn set over transition bitsets: an enabled member
+        # brings in every transition sharing one of its input places, a disabled member
+        # brings in the producers of one of its empty input places. Among the seeds,
+        # keep the set that enables fewest transitions.
+        best = enabled_mask
+        for seed in enabled[:self.stubborn_seeds]:
+            stubborn = 1 << seed
+            pending = stubborn
+            while pending and best & ~stubborn & enabled_mask:
+                low_bit = pending & -pending
+                pending ^= low_bit
+                t = low_bit.bit_length() - 1
+
+                if enabled_mask & low_bit:
+                    dependents = conflicts[t]
                 else:
-                    m = dq.pop()
-
-                enabled_t = [
-                    t
-                    for t in range(self.petri_net.num_transitions)
-                    if np.all(m >= self.petri_net.pre_matrix[:, t])
-                ]
-
-                for t in enabled_t:
-                    m_new = (
-                        m
-                        - self.petri_net.pre_matrix[:, t]
-                        + self.petri_net.post_matrix[:, t]
-                    )
-                    m_new_tuple = tuple(m_new)
-
-                    if m_new_tuple not in visited:
-                        visited.add(m_new_tuple)
-                        dq.append(m_new)
-                        marking_states.append(m_new)
+                    empty_place = next(p for p in input_places[t] if not (m >> p) & 1)
+                    dependents = producers[empty_place]
 
-            elapsed_time = time.time() - start_time
-            return marking_states, elapsed_time
+                added = dependents & ~stubborn
+                stubborn |= added
+                pending |= added
 
-        except Exception as e:
-            print(f"[Error] {e}")
-            return [], 0
+            if not pending and (stubborn & enabled_mask).bit_count() < best.bit_count():
+                best = stubborn & enabled_mask
+                if best.bit_count() == 1:
+                    break
+        return best
 
-    def print_reachable_markings(self, method="bfs", timeout=20.0):
-        states, elapsed_time = self.compute_reachable_markings(method, timeout)
+    def _stubborn_reachable_markings(self, method, timeout, start_time):
+        masks = self._get_transition_masks()
+        input_places = [
+            self.petri_net.transition_inputs(t).tolist()
+            for t in range(self.petri_net.num_transitions)
+        ]
+        conflicts = []
+        for inputs in input_places:
+            conflict_mask = 0
+            for p in inputs:
+                for t_dep in self.petri_net.place_to_transitions[p]:
+                    conflict_mask |= 1 << t_dep
+            conflicts.append(conflict_mask)
+        producers = []
+        for p_idx in range(self.petri_net.num_places):
+            producer_mask = 0
+            for t_dep in self.petri_net.place_to_producers[p_idx]:
+                producer_mask |= 1 << t_dep
+            producers.append(producer_mask)
 
-        if states == -1:
-            print(f"Time out (exceeded {timeout} seconds)")
-            return
+        m0 = self.encode_marking(self.petri_net.initial_marking)
+        dq = deque([m0])
+        visited = {m0}
 
-        print(f"Total states found: {len(states)}")
-        print(f"Execution time: {elapsed_time:.6f} seconds")
-        print("-" * 40)
+        marking_states = [m0]
+        pop = dq.popleft if method.lower() == "bfs" else dq.pop
+
+        telemetry = self.telemetry
+        expanded = 0
+
+        while dq:
+            if time.time() - start_time > timeout:
+                return -1, time.time() - start_time
+            if telemetry is not None and expanded % telemetry.interval == 0:
+                self._emit_step("stubborn", expanded, len(dq), len(visited))
+            expanded += 1
+
+            m = pop()
+
+            enabled = []
+            enabled_mask = 0
+            for t, (pre_mask, _, _) in enumerate(masks):
+                if m & pre_mask == pre_mask:
+                    enabled.append(t)
+                    enabled_mask |= 1 << t
+            if not enabled:
+                continue
+
+            stubborn = self._stubborn_set(
+                m, enabled, enabled_mask, masks, input_places, conflicts, producers
+            )
+            for t in enabled:
+                if not (stubborn >> t) & 1:
+                    continue
+
+                _, consume_mask, post_mask = masks[t]
+                m_rest = m & consume_mask
+                if m_rest & post_mask:
+                    raise ValueError("Net is not 1-safe, use engine='numpy'")
+                m_new = m_rest | post_mask
+
+                if m_new not in visited:
+                    visited.add(m_new)
+                    dq.append(m_new)
+                    marking_states.append(m_new)
+
+        elapsed_time = time.time() - start_time
+        return marking_states, elapsed_time
+
+    def find_deadlocks(self, markings):
+        masks = self._get_transition_masks()
+        deadlocks = []
+        for m in markings:
+            if not isinstance(m, int):
+                m = self.encode_marking(m)
+            if all(m & pre_mask != pre_mask for pre_mask, _, _ in masks):
+                deadlocks.append(m)
+        return deadlocks
+
+    def compare_reduction(self, method="dfs", timeout=20.0):
+        reduced, reduced_time = self.compute_reachable_markings(method, timeout, engine="stubborn")
+        full, full_time = self.compute_reachable_markings(method, timeout, engine="bitmask")
+
+        report = {
+            "reduced_states": None if reduced == -1 else len(reduced),
+            "reduced_time": reduced_time,
+            "full_states": None if full == -1 else len(full),
+            "full_time": full_time,
+            "reduced_deadlocks": None if reduced == -1 else len(self.find_deadlocks(reduced)),
+            "full_deadlocks": None,
+            "deadlocks_preserved": None,
+        }
+        if full != -1:
+            report["full_deadlocks"] = len(self.find_deadlocks(full))
+        if reduced != -1 and full != -1:
+            report["deadlocks_preserved"] = (
+                set(self.find_deadlocks(reduced)) == set(self.find_deadlocks(full))
+            )
+        return report
+
+    def print_reduction_report(self, method="dfs", timeout=20.0):
+        report = self.compare_reduction(method, timeout)
+
+        def fmt(value):
+            return "Timeout" if value is None else value
+
+        print(f"{'Exploration':<12} {'States':<12} {'Deadlocks':<12} {'Time (s)':<12}")
+        print("-" * 48)
+        print(
+            f"{'Stubborn':<12} {fmt(report['reduced_states']):<12} "
+            f"{fmt(report['reduced_deadlocks']):<12} {report['reduced_time']:<12.4f}"
+        )
+        print(
+            f"{'Full':<12} {fmt(report['full_states']):<12} "
+            f"{fmt(report['full_deadlocks']):<12} {report['full_time']:<12.4f}"
+        )
+        print("-" * 48)
+        if report["deadlocks_preserved"] is not None:
+            print(f"Deadlocks preserved: {report['deadlocks_preserved']}")
+        return report
+
+    def bitstate_search(self, method="dfs", timeout=20.0, num_bits=1 << 27, num_hashes=3):
+        """Approximate exploration storing visited markings in a fixed-size bit array.
+
+        A marking is treated as visited when all `num_hashes` bits derived from it are
+        set, so some states may be skipped by hash collisions. Returns a dict with the
+        number of states explored, the deadlocks met (bitmask ints), the hash factor
+        (bits per state) and the estimated coverage.
+        """
+        if method.lower() not in ["bfs", "dfs"]:
+            raise ValueError("Invalid method. Use 'bfs' or 'dfs'")
+
+        start_time = time.time()
+        masks = self._get_transition_masks()
+        bits = bytearray((num_bits + 7) // 8)
+        num_bytes = (self.petri_net.num_places + 7) // 8
+
+        def visit(m):
+            # Double hashing from the two 64-bit halves of a 128-bit digest of the
+            # whole marking (hash() on ints folds them modulo 2**61 - 1).
+            digest = hashlib.blake2b(m.to_bytes(num_bytes, "little"), digest_size=16).digest()
+            h1 = int.from_bytes(digest[:8], "little")
+            h2 = int.from_bytes(digest[8:], "little") | 1
+            seen = True
+            for _ in range(num_hashes):
+                idx = h1 % num_bits
+                byte, bit = idx >> 3, 1 << (idx & 7)
+                if not bits[byte] & bit:
+                    seen = False
+                    bits[byte] |= bit
+                h1 += h2
+            return seen
+
+        m0 = self.encode_marking(self.petri_net.initial_marking)
+        visit(m0)
+        dq = deque([m0])
+        pop = dq.popleft if method.lower() == "bfs" else dq.pop
+        explored = 1
+        deadlocks = []
+        timed_out = False
+
+        while dq:
+            if time.time() - start_time > timeout:
+                timed_out = True
+                break
+
+            m = pop()
+            enabled_any = False
+
+            for pre_mask, consume_mask, post_mask in masks:
+                if m & pre_mask != pre_mask:
+                    continue
+
+                enabled_any = True
+                m_rest = m & consume_mask
+                if m_rest & post_mask:
+                    raise ValueError("Net is not 1-safe, use compute_reachable_markings(engine='numpy')")
+                m_new = m_rest | post_mask
+
+                if not visit(m_new):
+                    explored += 1
+                    dq.append(m_new)
+
+            if not enabled_any:
+                deadlocks.append(m)
+
+        # Probability that a fresh state collides with bits already set (Holzmann).
+        false_positive = (1 - math.exp(-num_hashes * explored / num_bits)) ** num_hashes
+        return {
+            "states": explored,
+            "deadlocks": deadlocks,
+            "hash_factor": num_bits / explored,
+            "coverage": 1 - false_positive,
+            "timed_out": timed_out,
+            "time": time.time() - start_time,
+        }
+
+    def _pack_rows(self, markings):
+        # Each row becomes one fixed-size byte string, usable by np.unique / np.isin.
+        packed = np.ascontiguousarray(np.packbits(markings.astype(np.uint8), axis=1))
+        return packed.view(np.dtype((np.void, packed.shape[1]))).ravel()
+
+    def _arc_entries(self, indptr, indices, trans):
+        # (row, place) of every arc of trans[row], gathered from the CSC segments.
+        counts = (indptr[1:] - indptr[:-1])[trans]
+        rows = np.repeat(np.arange(len(trans)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return rows, indices[np.repeat(indptr[:-1][trans], counts) + offsets]
+
+    def _vectorized_reachable_markings(self, timeout, start_time):
+        net = self.petri_net
+
+        frontier = self.petri_net.initial_marking.reshape(1, -1).astype(np.int8)
+        visited = self._pack_rows(frontier)
+        levels = [frontier]
+        expanded = 0
+
+        while len(frontier):
+            if time.time() - start_time > timeout:
+                return -1, time.time() - start_time
+            if self.telemetry is not None:
+                self._emit_step("vectorized", expanded, len(frontier), len(visited))
+            expanded += len(frontier)
+
+            # Enabledness and firing both work on the sparse arcs: each successor
+            # row loses the input places and gains the output places of its transition.
+            rows, trans = np.nonzero(~net.disabled_transitions(frontier))
+            successors = frontier[rows]
+            arc_rows, arc_places = self._arc_entries(net.pre_indptr, net.pre_indices, trans)
+            successors[arc_rows, arc_places] -= 1
+            arc_rows, arc_places = self._arc_entries(net.post_indptr, net.post_indices, trans)
+            successors[arc_rows, arc_places] += 1
+            if successors.size and successors.max() > 1:
+                raise ValueError("Net is not 1-safe, use engine='numpy'")
+
+            # visited stays sorted, so membership and insertion are binary searches.
+            keys, first = np.unique(self._pack_rows(successors), return_index=True)
+            pos = np.searchsorted(visited, keys)
+            found = visited[np.minimum(pos, len(visited) - 1)] == keys
+            is_new = ~found
+
+            frontier = successors[first[is_new]]
+            visited = np.insert(visited, pos[is_new], keys[is_new])
+            levels.append(frontier)
+
+        marking_states = list(np.concatenate(levels))
+        elapsed_time = time.time() - start_time
+        return marking_states, elapsed_time
+
+    def _next_report(self, reports, processes, deadline):
+        while True:
+            try:
+                return reports.get(timeout=0.5)
+            except queue.Empty:
+                if time.time() > deadline:
+                    raise TimeoutError
+                if not all(proc.is_alive() for proc in processes):
+                    raise RuntimeError("A parallel exploration worker exited unexpectedly")
+
+    def _parallel_reachable_markings(self, timeout, start_time, workers=None):
+        num_workers = workers or os.cpu_count() or 1
+        masks = self._get_transition_masks()
+        num_bytes = (self.petri_net.num_places + 7) // 8
+
+        inboxes = [mp.Queue() for _ in range(num_workers)]
+        commands = [mp.Queue() for _ in range(num_workers)]
+        reports = mp.Queue()
+        processes = [
+            mp.Process(
+                target=_partition_worker,
+                args=(w, masks, num_bytes, inboxes, commands, reports),
+                daemon=True,
+            )
+            for w in range(num_workers)
+        ]
+        for proc in processes:
+            proc.start()
+
+        try:
+            # Every worker reads exactly one batch per worker at each BFS level.
+            m0 = self.encode_marking(self.petri_net.initial_marking)
+            owner = _marking_owner(m0, num_bytes, num_workers)
+            for w, inbox in enumerate(inboxes):
+                inbox.put((0, [m0] if w == owner else []))
+                for _ in range(num_workers - 1):
+                    inbox.put((0, []))
+
+            deadline = start_time + timeout
+            visited = 1
+            while True:
+                discovered = 0
+                for _ in range(num_workers):
+                    _, new_count, error = self._next_report(reports, processes, deadline)
+                    if error is not None:
+                        raise ValueError(error)
+                    discovered += new_count
+                visited += discovered
+                if self.telemetry is not None:
+                    self._emit_step("parallel", visited - discovered, discovered, visited)
+
+                if time.time() > deadline:
+                    return -1, time.time() - start_time
+                command = "stop" if discovered == 0 else "continue"
+                for command_queue in commands:
+                    command_queue.put(command)
+                if command == "stop":
+                    break
+
+            marking_states = []
+            for _ in range(num_workers):
+                _, partition, _ = self._next_report(reports, processes, float("inf"))
+                marking_states.extend(partition)
+        except TimeoutError:
+            return -1, time.time() - start_time
+        finally:
+            for proc in processes:
+                proc.terminate()
+                proc.join()
+
+        elapsed_time = time.time() - start_time
+        return marking_states, elapsed_time
+
+    def iter_reachable_markings(self, method="bfs", timeout=20.0, visited=None, packed=False):
+        """Yield reachable markings as they are discovered.
+
+        `visited` is None (in-memory set), "disk" (temporary DiskVisitedSet) or any
+        object supporting `in` and `add`. Markings are yielded as NumPy arrays, or
+        as bitmask ints when `packed` is True. Raises TimeoutError after `timeout`.
+        An invalid method raises ValueError here, before the first marking.
+        """
+        if method.lower() not in ["bfs", "dfs"]:
+            raise ValueError("Invalid method. Use 'bfs' or 'dfs'")
+        return self._iter_reachable_markings(method, timeout, visited, packed)
+
+    def _iter_reachable_markings(self, method, timeout, visited, packed):
+        start_time = time.time()
+        masks = self._get_transition_masks()
+
+        owns_visited = visited == "disk"
+        if visited is None:
+            visited = set()
+        elif owns_visited:
+            visited = DiskVisitedSet(self.petri_net.num_places)
+
+        output = (lambda code: code) if packed else self.decode_marking
+        telemetry = self.telemetry
+        if telemetry is not None:
+            telemetry.start("explicit")
+        expanded = 0
+
+        try:
+            m0 = self.encode_marking(self.petri_net.initial_marking)
+            visited.add(m0)
+            dq = deque([m0])
+            pop = dq.popleft if method.lower() == "bfs" else dq.pop
+            yield output(m0)
+
+            while dq:
+                if time.time() - start_time > timeout:
+                    raise TimeoutError(f"Exceeded {timeout} seconds")
+                if telemetry is not None and expanded % telemetry.interval == 0:
+                    self._emit_step("iterator", expanded, len(dq), len(visited))
+                expanded += 1
+
+                m = pop()
+
+                for pre_mask, consume_mask, post_mask in masks:
+                    if m & pre_mask != pre_mask:
+                        continue
+
+                    m_rest = m & consume_mask
+                    if m_rest & post_mask:
+                        raise ValueError("Net is not 1-safe, use compute_reachable_markings(engine='numpy')")
+                    m_new = m_rest | post_mask
+
+                    if m_new not in visited:
+                        visited.add(m_new)
+                        dq.append(m_new)
+                        yield output(m_new)
+        finally:
+            if owns_visited:
+                visited.close()
+
+    def print_reachable_markings(self, method="bfs", timeout=20.0, visited=None):
+        start_time = time.time()
+        total_states = 0
 
         print("Reachable marking states:")
         print("-" * 40)
 
-        for state in states:
-            marking = {
-                self.petri_net.places[i]: int(state[i])
-                for i in range(self.petri_net.num_places)
-            }
-            print(marking)
+        try:
+            for state in self.iter_reachable_markings(method, timeout, visited, packed=True):
+                state = self.decode_marking(state)
+                marking = {
+                    self.petri_net.places[i]: int(state[i])
+                    for i in range(self.petri_net.num_places)
+                }
+                print(marking)
+                total_states += 1
+        except TimeoutError:
+            print("-" * 40)
+            print(f"Time out (exceeded {timeout} seconds)")
+            return
 
         print("-" * 40)
+        print(f"Total states found: {total_states}")
+        print(f"Execution time: {time.time() - start_time:.6f} seconds")
+        print("-" * 40)
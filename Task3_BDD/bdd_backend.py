@@ -0,0 +1,115 @@
+import os
+import tempfile
+from dd import autoref
+
+try:
+    from dd import cudd
+except ImportError:
+    cudd = None
+
+
+BACKENDS = ["auto", "cudd", "autoref"]
+
+
+class BDDBackend:
+    """Common interface over the dd BDD managers used by Tasks 3-5.
+
+    "cudd" wraps the native CUDD bindings, "autoref" the pure-Python manager and
+    "auto" picks cudd when it is importable. Nodes returned here are the
+    backend's own Function objects, so &, |, ~, == and equiv work on them
+    directly; everything that needs the manager goes through this class.
+    """
+
+    def __init__(self, backend="auto", reordering=False):
+        if backend not in BACKENDS:
+            raise ValueError("Invalid backend. Use 'auto', 'cudd' or 'autoref'")
+        if backend == "auto":
+            backend = "cudd" if cudd is not None else "autoref"
+        if backend == "cudd" and cudd is None:
+            raise ImportError("dd.cudd is not available, use backend='autoref'")
+
+        self.name = backend
+        self._module = cudd if backend == "cudd" else autoref
+        self.manager = self._module.BDD()
+        # Native dump format: CUDD's DDDMP loads in C, autoref only reads JSON.
+        self.dump_suffix = ".dddmp" if backend == "cudd" else ".json"
+        # CUDD reorders by default; keep the order fixed unless asked otherwise.
+        self.manager.configure(reordering=reordering)
+
+    @property
+    def true(self):
+        return self.manager.true
+
+    @property
+    def false(self):
+        return self.manager.false
+
+    @property
+    def vars(self):
+        return self.manager.vars
+
+    def __len__(self):
+        return len(self.manager)
+
+    def configure(self, **kwargs):
+        return self.manager.configure(**kwargs)
+
+    def declare(self, *names):
+        self.manager.declare(*names)
+
+    def var(self, name):
+        return self.manager.var(name)
+
+    def cube(self, assignment):
+        return self.manager.cube(assignment)
+
+    def level_of_var(self, name):
+        return self.manager.level_of_var(name)
+
+    def reorder(self, order=None):
+        self._module.reorder(self.manager, order)
+
+    def exist(self, qvars, u):
+        return self.manager.exist(qvars, u)
+
+    def let(self, definitions, u):
+        return self.manager.let(definitions, u)
+
+    def and_exists(self, u, v, qvars):
+        # Relational product: exists qvars. u & v
+        if self._module is cudd:
+            return cudd.and_exists(u, v, qvars)
+        return self.manager.exist(qvars, u & v)
+
+    def pick(self, u, care_vars=None):
+        return self.manager.pick(u, care_vars=care_vars)
+
+    def pick_iter(self, u, care_vars=None):
+        return self.manager.pick_iter(u, care_vars=care_vars)
+
+    def count(self, u, nvars=None):
+        # CUDD returns a float; both backends agree once converted.
+        return int(self.manager.count(u, nvars=nvars))
+
+    def to_expr(self, u):
+        return self.manager.to_expr(u)
+
+    def dump(self, filename, roots):
+        if self._module is autoref or not filename.endswith(".dot"):
+            self.manager.dump(filename, roots=roots)
+            return
+
+        # CUDD cannot write DOT: go through JSON into an autoref manager that
+        # has the same variable order.
+        fd, json_path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            self.manager.dump(json_path, roots=roots)
+            mirror = autoref.BDD()
+            mirror.declare(*sorted(self.manager.vars, key=self.manager.level_of_var))
+            mirror.dump(filename, roots=mirror.load(json_path))
+        finally:
+            os.remove(json_path)
+
+    def load(self, filename):
+        return self.manager.load(filename)
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+
+
+class BDDCache:
+    """Directory of BDD dumps addressed by content hash.
+
+    An entry "<key>.<name>" is a JSON sidecar "<key>.<name>.meta" plus one
+    dump per root in the backend's native format (DDDMP for CUDD, which only
+    writes single roots, JSON for autoref). Loading an entry touches its
+    files, and after each save the least recently used files are deleted until
+    the directory fits in max_bytes; an entry with a missing file is a miss.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def net_key(petri_net, var_order):
+        digest = hashlib.sha256()
+        for part in (petri_net.places, petri_net.transitions, var_order):
+            digest.update(json.dumps(list(part)).encode())
+        # Arcs are hashed in their sparse form so large nets never go dense here.
+        for array in (
+            petri_net.pre_indptr,
+            petri_net.pre_indices,
+            petri_net.post_indptr,
+            petri_net.post_indices,
+        ):
+            digest.update(str(array.shape).encode())
+            digest.update(array.astype("int32").tobytes())
+        digest.update(petri_net.initial_marking.astype("int8").tobytes())
+        return digest.hexdigest()
+
+    def _base(self, key, name):
+        return os.path.join(self.directory, f"{key}.{name}")
+
+    def load(self, bdd, key, name):
+        """Return (roots, meta) from the cache, or None when the entry is missing."""
+        base = self._base(key, name)
+        meta_path = base + ".meta"
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            roots = []
+            for i in range(meta["roots"]):
+                dump_path = f"{base}.{i}{bdd.dump_suffix}"
+                if not os.path.exists(dump_path):
+                    return None
+                roots.extend(bdd.load(dump_path))
+                os.utime(dump_path)
+            os.utime(meta_path)
+        except Exception as e:
+            print(f"[Error] Cannot load cached BDD {base}: {e}")
+            return None
+        return roots, meta
+
+    def save(self, bdd, key, name, roots, meta=None):
+        base = self._base(key, name)
+        meta = dict(meta or {}, roots=len(roots))
+        for i, root in enumerate(roots):
+            # Write under a temporary name so a crash never leaves a truncated dump.
+            dump_path = f"{base}.{i}{bdd.dump_suffix}"
+            tmp_path = f"{base}.{i}.tmp{bdd.dump_suffix}"
+            bdd.dump(tmp_path, roots=[root])
+            os.replace(tmp_path, dump_path)
+        # The sidecar goes last: it is what marks the entry as complete.
+        with open(base + ".meta", "w") as f:
+            json.dump(meta, f)
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for file_name in os.listdir(self.directory):
+            path = os.path.join(self.directory, file_name)
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
@@ -1,16 +1,32 @@
 import time
 import numpy as np
-from dd import autoref as bdd
 import sys
 import re
 from Task1_Parser.task1 import PetriNet
+from Task3_BDD.bdd_backend import BDDBackend
+from Task3_BDD.bdd_cache import BDDCache
+from Telemetry.telemetry import Telemetry
 
 sys.setrecursionlimit(10000)
 
 class BDD_Reachability:
-    def __init__(self, petri_net: PetriNet):
+    def __init__(
+        self,
+        petri_net: PetriNet,
+        ordering: str = "file",
+        reordering: bool = False,
+        reorder_threshold: int = None,
+        backend: str = "auto",
+        cache_dir: str = None,
+        cache_max_bytes: int = 256 * 1024 * 1024,
+        telemetry: Telemetry = None,
+    ):
         self.petri_net = petri_net
-        self.bdd = bdd.BDD()
+        self.ordering = ordering
+        self.reorder_threshold = reorder_threshold
+        self.bdd = BDDBackend(backend, reordering=reordering)
+        self.cache = BDDCache(cache_dir, cache_max_bytes) if cache_dir else None
+        self.telemetry = telemetry
         self._initialize_bdd_variables()
     
     def _sanitize_name(self, name):
@@ -20,8 +36,9 @@ class BDD_Reachability:
         return sanitized
     
     def _initialize_bdd_variables(self):
-        for p in self.petri_net.places:
-            safe_p = self._sanitize_name(p)
+        # Current and next-state variables stay interleaved whatever the place order.
+        for p_idx in self.petri_net.compute_place_order(self.ordering):
+            safe_p = self._sanitize_name(self.petri_net.places[p_idx])
             self.bdd.declare(f"{safe_p}")
             self.bdd.declare(f"y_{safe_p}")
 
@@ -34,101 +51,456 @@ class BDD_Reachability:
             safe_p = self._sanitize_name(p)
             self.reverse_name_map[f'{safe_p}'] = f'{p}'
             self.reverse_name_map[f'y_{safe_p}'] = f'y_{p}'
+        self.state_columns = {
+            self._sanitize_name(p): i for i, p in enumerate(self.petri_net.places)
+        }
         self._reachable_bdd = None
+        self.construction_time = 0.0
+        self.fixpoint_time = 0.0
+        self.peak_nodes = 0
+        self.cache_hit = False
 
     def build_initial_state_bdd(self):
-        expr = []
-        for i, p in enumerate(self.petri_net.places):
-            safe_p = self._sanitize_name(p)
-            if self.petri_net.initial_marking[i] > 0:
-                expr.append(f"{safe_p}")
-            else:
-                expr.append(f"~{safe_p}")
-        return self.bdd.add_expr(" & ".join(expr))
+        assignment = {
+            self._sanitize_name(p): bool(self.petri_net.initial_marking[i] > 0)
+            for i, p in enumerate(self.petri_net.places)
+        }
+        return self.bdd.cube(assignment)
+
+    def _transition_relation(self, t_idx):
+        # Relation of a single transition over its own places only (no frame condition).
+        input_places = self.petri_net.transition_inputs(t_idx)
+        output_places = self.petri_net.transition_outputs(t_idx)
+
+        input_ids = [self.petri_net.places[i] for i in input_places]
+        output_ids = [self.petri_net.places[i] for i in output_places]
+
+        # Enable: inputs marked, pure outputs empty. Update: pure inputs emptied,
+        # outputs marked. Together they form a single cube.
+        assignment = {}
+        for p in input_ids:
+            assignment[self._sanitize_name(p)] = True
+        for p in output_ids:
+            if p not in input_ids:
+                assignment[self._sanitize_name(p)] = False
+        for p in input_ids:
+            if p not in output_ids:
+                assignment[f"y_{self._sanitize_name(p)}"] = False
+        for p in output_ids:
+            assignment[f"y_{self._sanitize_name(p)}"] = True
+
+        involved_places = set(input_ids) | set(output_ids)
+        return self.bdd.cube(assignment), involved_places
+
+    def _frame_relation(self, places):
+        # Conjoin bottom-up in variable order so each step only adds nodes on top.
+        frame = self.bdd.true
+        safe_places = sorted(
+            (self._sanitize_name(p) for p in places),
+            key=self.bdd.level_of_var,
+            reverse=True,
+        )
+        for safe_p in safe_places:
+            frame &= self.bdd.var(safe_p).equiv(self.bdd.var(f"y_{safe_p}"))
+        return frame
 
     def build_transition(self):
         R_total = self.bdd.false
 
         for t_idx in range(self.petri_net.num_transitions):
             t_id = self.petri_net.transitions[t_idx]
+            try:
+                R_t, involved_places = self._transition_relation(t_idx)
+                untouched = [p for p in self.petri_net.places if p not in involved_places]
+                R_t = R_t & self._frame_relation(untouched)
+            except Exception as e:
+                print(f"Error building BDD for transition {t_id}: {e}")
+                continue
+            R_total = R_total | R_t
+        return R_total
 
-            input_places = np.where(self.petri_net.pre_matrix[:, t_idx] == 1)[0]
-            output_places = np.where(self.petri_net.post_matrix[:, t_idx] == 1)[0]
+    def build_transition_clusters(self, max_support=None):
+        """Partition the transition relation into clusters of transitions.
 
-            input_ids = [self.petri_net.places[i] for i in input_places]
-            output_ids = [self.petri_net.places[i] for i in output_places]
+        Each cluster is (relation, qvars, rename): the relation only mentions the
+        places of its transitions, so image computation quantifies just those
+        current-state variables. With max_support=None every transition is its own
+        cluster, otherwise transitions are merged while their joint support stays
+        within max_support places.
+        """
+        relations = []
+        for t_idx in range(self.petri_net.num_transitions):
+            t_id = self.petri_net.transitions[t_idx]
+            try:
+                R_t, involved_places = self._transition_relation(t_idx)
+            except Exception as e:
+                print(f"Error building BDD for transition {t_id}: {e}")
+                continue
+            if involved_places:
+                relations.append((R_t, involved_places))
 
-            involved_places = set(input_ids) | set(output_ids)
+        # Neighbouring transitions in variable order tend to share places.
+        relations.sort(
+            key=lambda item: min(self.bdd.level_of_var(self._sanitize_name(p)) for p in item[1])
+        )
 
-            enable_expr = []
-            for p in input_ids:
-                safe_p = self._sanitize_name(p)
-                enable_expr.append(f"{safe_p}")
-            for p in output_ids:
-                if p not in input_ids:
-                    safe_p = self._sanitize_name(p)
-                    enable_expr.append(f"~{safe_p}")
+        groups = []
+        for R_t, involved_places in relations:
+            if groups and max_support is not None:
+                members, support = groups[-1]
+                if len(support | involved_places) <= max_support:
+                    members.append((R_t, involved_places))
+                    groups[-1] = (members, support | involved_places)
+                    continue
+            groups.append(([(R_t, involved_places)], set(involved_places)))
 
-            update_expr = []
-            for p in input_ids:
-                if p not in output_ids:
-                    safe_p = self._sanitize_name(p)
-                    update_expr.append(f"~y_{safe_p}")
+        clusters = []
+        for members, support in groups:
+            relation = self.bdd.false
+            for R_t, involved_places in members:
+                relation |= R_t & self._frame_relation(support - involved_places)
+            qvars = {self._sanitize_name(p) for p in support}
+            rename = {f"y_{safe_p}": safe_p for safe_p in qvars}
+            clusters.append((relation, qvars, rename))
+        return clusters
 
-            for p in output_ids:
-                safe_p = self._sanitize_name(p)
-                update_expr.append(f"y_{safe_p}")
+    def image(self, states, clusters):
+        next_states = self.bdd.false
+        for relation, qvars, rename in clusters:
+            # Only the cluster's own places are quantified; all others carry over unchanged.
+            next_states |= self.bdd.let(rename, self.bdd.and_exists(states, relation, qvars))
+        return next_states
 
-            frame_expr = []
-            for p in self.petri_net.places:
-                if p not in involved_places:
-                    safe_p = self._sanitize_name(p)
-                    frame_expr.append(f"(y_{safe_p} <-> {safe_p})")
+    def _track_nodes(self):
+        # Called after every fixpoint step: record the peak and sift past the threshold.
+        nodes = len(self.bdd)
+        self.peak_nodes = max(self.peak_nodes, nodes)
+        if self.reorder_threshold is not None and nodes > self.reorder_threshold:
+            self.bdd.reorder()
+            self.reorder_threshold = max(self.reorder_threshold, len(self.bdd)) * 2
 
-            full_expr = enable_expr + update_expr + frame_expr
-            try:
-                R_t = self.bdd.add_expr(" & ".join(full_expr))
-            except Exception as e:
-                print(f"Error building BDD for transition {t_id}: {e}")
-                continue
-            R_total = R_total | R_t
-        return R_total
+    def _emit_step(self, strategy, frontier, states, image_time, relation_nodes, **fields):
+        # One telemetry record per fixpoint step; counting is skipped entirely
+        # when no Telemetry is attached.
+        if self.telemetry is None:
+            return
+        self.telemetry.emit(
+            strategy=strategy,
+            frontier_states=self.bdd.count(frontier, nvars=self.petri_net.num_places),
+            frontier_nodes=frontier.dag_size,
+            reachable_nodes=states.dag_size,
+            relation_nodes=relation_nodes,
+            live_nodes=len(self.bdd),
+            image_time=image_time,
+            **fields,
+        )
 
-    def compute_reachable_states(self):
+    def _saturation_order(self, clusters):
+        # Clusters whose top variable sits lowest in the order are saturated first.
+        def top_level(cluster):
+            return min(self.bdd.level_of_var(v) for v in cluster[1])
+        return sorted(clusters, key=top_level, reverse=True)
+
+    def _cache_key(self):
+        var_order = sorted(self.bdd.vars, key=self.bdd.level_of_var)
+        return BDDCache.net_key(self.petri_net, var_order)
+
+    def _load_clusters(self, key, name):
+        entry = self.cache.load(self.bdd, key, name)
+        if entry is None:
+            return None
+        relations, meta = entry
+        clusters = []
+        for relation, qvars in zip(relations, meta["qvars"]):
+            clusters.append((relation, set(qvars), {f"y_{safe_p}": safe_p for safe_p in qvars}))
+        return clusters
+
+    def compute_reachable_states(self, relation="clustered", max_support=16, strategy="bfs"):
+        """Return (reachable BDD, state count, total seconds).
+
+        The split between building the relation and running the fixpoint is kept in
+        self.construction_time and self.fixpoint_time. With a cache directory the
+        reachable set and the relation are loaded from / saved to disk, keyed by
+        the net structure and the variable order.
+        """
         start = time.time()
 
-        R = self.build_transition()
+        if relation not in ["monolithic", "partitioned", "clustered"]:
+            raise ValueError("Invalid relation. Use 'monolithic', 'partitioned' or 'clustered'")
+        if strategy not in ["bfs", "chaining", "saturation"]:
+            raise ValueError("Invalid strategy. Use 'bfs', 'chaining' or 'saturation'")
+
+        self.cache_hit = False
+        if self.cache is not None:
+            key = self._cache_key()
+            entry = self.cache.load(self.bdd, key, "reachable")
+            if entry is not None:
+                current_states = entry[0][0]
+                end = time.time()
+                self.cache_hit = True
+                self.construction_time = 0.0
+                self.fixpoint_time = end - start
+                self.peak_nodes = len(self.bdd)
+                self._reachable_bdd = current_states
+                total_states = self.bdd.count(current_states, nvars=self.petri_net.num_places)
+                return current_states, total_states, end - start
+
+        relation_name = f"{relation}-{max_support}" if relation == "clustered" else relation
+        clusters = None
+        if self.cache is not None:
+            clusters = self._load_clusters(key, relation_name)
+        if clusters is None:
+            if relation == "monolithic":
+                exist_vars = {f'{self._sanitize_name(p)}' for p in self.petri_net.places}
+                clusters = [(self.build_transition(), exist_vars, self.rename_map)]
+            else:
+                clusters = self.build_transition_clusters(
+                    max_support if relation == "clustered" else None
+                )
+            if self.cache is not None:
+                self.cache.save(
+                    self.bdd,
+                    key,
+                    relation_name,
+                    [cluster[0] for cluster in clusters],
+                    meta={"qvars": [sorted(cluster[1]) for cluster in clusters]},
+                )
 
         current_states = self.build_initial_state_bdd()
-        new_states = current_states
+        fixpoint_start = time.time()
+        self.construction_time = fixpoint_start - start
+        self.peak_nodes = len(self.bdd)
+        relation_nodes = None
+        if self.telemetry is not None:
+            self.telemetry.start("bdd")
+            relation_nodes = sum(cluster[0].dag_size for cluster in clusters)
 
-        while True:
+        if strategy == "bfs":
+            new_states = current_states
+            while True:
+                image_start = time.time()
+                next_states = self.image(new_states, clusters)
+                new_states = next_states & ~current_states
+                image_time = time.time() - image_start
 
-            transitions = new_states & R
+                if new_states == self.bdd.false:
+                    break
 
-            exist_vars = [f'{self._sanitize_name(p)}' for p in self.petri_net.places]
-            next_states_vars = self.bdd.exist(exist_vars, transitions)
-            next_states = self.bdd.let(self.rename_map, next_states_vars)
-            new_states = next_states & ~current_states
+                current_states = current_states | new_states
+                self._track_nodes()
+                self._emit_step(strategy, new_states, current_states, image_time, relation_nodes)
 
-            if new_states == self.bdd.false:
-                break
+        elif strategy == "chaining":
+            # Each cluster fires on the states produced by the clusters before it.
+            while True:
+                previous_states = current_states
+                image_start = time.time()
+                for cluster in clusters:
+                    current_states = current_states | self.image(current_states, [cluster])
+                image_time = time.time() - image_start
+                self._track_nodes()
+                if current_states == previous_states:
+                    break
+                self._emit_step(
+                    strategy, current_states & ~previous_states, current_states, image_time, relation_nodes
+                )
 
-            current_states = current_states | new_states
+        else:
+            # Saturate each cluster to a local fixpoint, bottom of the variable order
+            # first; whenever a cluster adds states, the clusters below it are
+            # saturated again before moving up.
+            ordered = self._saturation_order(clusters)
+            i = 0
+            while i < len(ordered):
+                grew = False
+                while True:
+                    image_start = time.time()
+                    next_states = self.image(current_states, [ordered[i]]) & ~current_states
+                    image_time = time.time() - image_start
+                    if next_states == self.bdd.false:
+                        break
+                    current_states = current_states | next_states
+                    grew = True
+                    self._track_nodes()
+                    self._emit_step(
+                        strategy, next_states, current_states, image_time, relation_nodes, cluster=i
+                    )
+                i = 0 if grew and i > 0 else i + 1
 
         end = time.time()
-        total_states = self.bdd.count(current_states)
+        self.fixpoint_time = end - fixpoint_start
+        total_states = self.bdd.count(current_states, nvars=self.petri_net.num_places)
+        self._reachable_bdd = current_states
+        if self.cache is not None:
+            self.cache.save(self.bdd, key, "reachable", [current_states])
 
         return current_states, total_states, end - start
 
+    def state_positions(self):
+        """Return ({state variable: position}, place column of each position).
+
+        Positions number the current-state variables top-down in the BDD's
+        present variable order.
+        """
+        order = sorted(self.state_columns, key=self.bdd.level_of_var)
+        position = {v: i for i, v in enumerate(order)}
+        columns = np.array([self.state_columns[v] for v in order], dtype=np.int64)
+        return position, columns
+
+    @staticmethod
+    def _expand_cubes(cubes, start=0, stop=None):
+        # Expand don't-cares (-1) of cubes that all have the same number k of
+        # free positions: row e of a cube gives its j-th free position bit j of e.
+        cubes = np.asarray(cubes)
+        free = cubes < 0
+        k = int(free[0].sum())
+        if stop is None:
+            stop = 1 << k
+        offsets = np.arange(start, stop, dtype=np.int64)
+        rank = np.maximum(np.cumsum(free, axis=1) - 1, 0)
+
+        rows = np.repeat(cubes, len(offsets), axis=0)
+        rows_free = np.repeat(free, len(offsets), axis=0)
+        rows_rank = np.repeat(rank, len(offsets), axis=0)
+        bits = (np.tile(offsets, len(cubes))[:, None] >> rows_rank) & 1
+        return np.where(rows_free, bits, rows).astype(np.uint8)
+
+    def iter_state_chunks(self, states_bdd, chunk_size=1 << 16, packed=False, block_limit=1 << 12):
+        """Yield the markings of states_bdd as uint8 arrays of shape (n, num_places).
+
+        Columns follow PetriNet place order and each chunk holds at most
+        chunk_size rows. The top of the BDD is walked path by path; once a node
+        has at most block_limit satisfying assignments below it, all of them are
+        built as one array (memoized, since lower nodes are heavily shared) and
+        combined with the path prefix, whose don't-care places are expanded in
+        bulk. With packed=True rows are bit-packed along the place axis
+        (np.packbits), i.e. (num_places + 7) // 8 bytes per marking.
+        """
+        num_places = self.petri_net.num_places
+        position, columns = self.state_positions()
+        block_limit = max(1, min(block_limit, chunk_size))
+
+        # Nodes are taken with a parity bit for the complement edges seen on the
+        # way down; the TRUE terminal is the regular (non-negated) constant.
+        def pos(node):
+            return num_places if node.var is None else position[node.var]
+
+        def children(node, parity):
+            if node.var not in position:
+                raise ValueError(f"BDD mentions non-state variable {node.var}")
+            child_parity = parity != node.negated
+            return ((node.low, child_parity), (node.high, child_parity))
+
+        counts = {}
+
+        def count(node, parity):
+            # Satisfying assignments over the positions from pos(node) down.
+            if node.var is None:
+                return int(parity == node.negated)
+            key = (node, parity)
+            if key not in counts:
+                i = pos(node)
+                counts[key] = sum(
+                    count(child, child_parity) << (pos(child) - i - 1)
+                    for child, child_parity in children(node, parity)
+                )
+            return counts[key]
+
+        blocks = {}
+
+        def suffix_rows(node, parity):
+            # All assignments below node as rows over positions pos(node)..end.
+            if node.var is None:
+                return np.zeros((int(parity == node.negated), 0), dtype=np.uint8)
+            key = (node, parity)
+            if key not in blocks:
+                i = pos(node)
+                parts = []
+                for value, (child, child_parity) in enumerate(children(node, parity)):
+                    sub = suffix_rows(child, child_parity)
+                    if len(sub) == 0:
+                        continue
+                    gap = pos(child) - i - 1
+                    if gap:
+                        free = self._expand_cubes([np.full(gap, -1, dtype=np.int8)])
+                        sub = np.hstack([np.repeat(free, len(sub), axis=0), np.tile(sub, (len(free), 1))])
+                    head = np.full((len(sub), 1), value, dtype=np.uint8)
+                    parts.append(np.hstack([head, sub]))
+                blocks[key] = np.vstack(parts)
+            return blocks[key]
+
+        in_place_order = np.array_equal(columns, np.arange(num_places))
+
+        def to_columns(rows):
+            if in_place_order:
+                out = rows
+            else:
+                out = np.empty_like(rows)
+                out[:, columns] = rows
+            return np.packbits(out, axis=1) if packed else out
+
+        def emit(prefix, suffix):
+            # Cross product of the expanded prefix cube with the suffix rows.
+            k = int((prefix < 0).sum())
+            per_slice = max(1, chunk_size // len(suffix))
+            for start in range(0, 1 << k, per_slice):
+                heads = self._expand_cubes([prefix], start, min(start + per_slice, 1 << k))
+                yield np.hstack([np.repeat(heads, len(suffix), axis=0), np.tile(suffix, (len(heads), 1))])
+
+        try:
+            buffered = []
+            buffered_rows = 0
+            cube = np.full(num_places, -1, dtype=np.int8)
+            assigned = []
+            stack = [(states_bdd, False, 0, -1, 0)]
+            while stack:
+                node, parity, depth, at, value = stack.pop()
+                while len(assigned) > depth:
+                    cube[assigned.pop()] = -1
+                if at >= 0:
+                    cube[at] = value
+                    assigned.append(at)
+
+                total = count(node, parity)
+                if total == 0:
+                    continue
+                if total > block_limit:
+                    depth = len(assigned)
+                    for value, (child, child_parity) in reversed(list(enumerate(children(node, parity)))):
+                        stack.append((child, child_parity, depth, pos(node), value))
+                    continue
+
+                for rows in emit(cube[:pos(node)], suffix_rows(node, parity)):
+                    buffered.append(rows)
+                    buffered_rows += len(rows)
+                    if buffered_rows >= chunk_size:
+                        block = np.concatenate(buffered)
+                        for start in range(0, len(block) - chunk_size + 1, chunk_size):
+                            yield to_columns(block[start:start + chunk_size])
+                        remainder = len(block) % chunk_size
+                        buffered = [block[len(block) - remainder:]] if remainder else []
+                        buffered_rows = remainder
+
+            if buffered:
+                block = np.concatenate(buffered)
+                for start in range(0, len(block), chunk_size):
+                    yield to_columns(block[start:start + chunk_size])
+        finally:
+            # The recursive helpers form reference cycles through their own cells,
+            # which also keep self (and so the manager) alive. Drop the memoized
+            # nodes and break the cycles, so the manager is never collected by the
+            # cycle collector together with, and possibly before, its nodes.
+            counts.clear()
+            blocks.clear()
+            count = suffix_rows = None
+
+    def marking_from_row(self, row):
+        return {p: int(row[i]) for i, p in enumerate(self.petri_net.places)}
+
     def print_reachable_states_list(self, states_bdd):
-        it = self.bdd.pick_iter(states_bdd)
-        for state in it:
-            marking = {}
-            for p in self.petri_net.places:
-                safe_p = self._sanitize_name(p)
-                marking[p] = int(state[f"{safe_p}"])
-            print(marking)
+        for chunk in self.iter_state_chunks(states_bdd):
+            for row in chunk:
+                print(self.marking_from_row(row))
 
     def get_expr_from_bdd(self, bdd_node):
         if bdd_node is None:
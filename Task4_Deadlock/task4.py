@@ -2,6 +2,7 @@ import pulp
 import time
 import numpy as np
 from Task1_Parser.task1 import PetriNet
+from Task2_Explicit.task2 import ExplicitTraverse
 from Task3_BDD.task3 import BDD_Reachability
 
 
@@ -22,7 +23,7 @@ class ILP_BDD_Deadlock_Detection:
         else:
             self.bdd_reach = bdd_reach
         self.bdd = self.bdd_reach.bdd
-        self.reachable_marking_nums = reachable_marking_nums
+        self._reachable_marking_nums = reachable_marking_nums
         self.marking_limit = marking_limit
         self.place_limit = place_limit
         self.transition_limit = transition_limit
@@ -31,37 +32,34 @@ class ILP_BDD_Deadlock_Detection:
 
         self.input_places = []
         for t_idx, t in enumerate(self.petri_net.transitions):
-            idxs = np.where(self.petri_net.pre_matrix[:, t_idx] == 1)[0]
+            idxs = self.petri_net.transition_inputs(t_idx)
             self.input_places.append([self.petri_net.places[i] for i in idxs])
         self.output_places = []
         for t_idx, t in enumerate(self.petri_net.transitions):
-            idxs = np.where(self.petri_net.post_matrix[:, t_idx] == 1)[0]
+            idxs = self.petri_net.transition_outputs(t_idx)
             self.output_places.append([self.petri_net.places[i] for i in idxs])
 
-        self.ilp_model = pulp.LpProblem("Deadlock_ILP", pulp.LpMaximize)
-        self.enabled_vars = {
-            t: pulp.LpVariable(f"e_{t}", 0, 1, cat="Binary")
-            for t in self.petri_net.transitions
-        }
-
-        self.t_constraints = {}
-        for t in self.petri_net.transitions:
-            e = self.enabled_vars[t]
-            cons = pulp.LpConstraint(
-                e, sense=pulp.LpConstraintLE, rhs=1, name=f"cons_{t}"
-            )
-            self.ilp_model.addConstraint(cons)
-            self.t_constraints[t] = cons
-
-        self.ilp_model += pulp.lpSum(self.enabled_vars.values())
-        self.solver = pulp.PULP_CBC_CMD(msg=False)
+        # Enabledness is a set-inclusion test (•t within the marked places), so
+        # markings are checked in bulk straight from the sparse arcs: t is
+        # disabled in row M iff one of its input places is unmarked.
+        self.input_counts = np.diff(self.petri_net.pre_indptr)
+        self._explicit_reachable = None
 
-        if self.reachable_marking_nums is None:
+    @property
+    def reachable_marking_nums(self):
+        # Only computed when find_deadlock needs it: the state-equation mode
+        # never builds the reachable set.
+        if self._reachable_marking_nums is None:
             try:
                 _, total_states, _ = self.bdd_reach.compute_reachable_states()
-                self.reachable_marking_nums = total_states
+                self._reachable_marking_nums = total_states
             except Exception:
-                self.reachable_marking_nums = 0
+                self._reachable_marking_nums = 0
+        return self._reachable_marking_nums
+
+    @reachable_marking_nums.setter
+    def reachable_marking_nums(self, value):
+        self._reachable_marking_nums = value
 
     def _state_to_marking(self, state):
         return {
@@ -69,34 +67,9 @@ class ILP_BDD_Deadlock_Detection:
             for p in self.petri_net.places
         }
 
-    def _is_deadlock_ilp(self, marking):
-        all_zero = True
-
-        for t_idx, t in enumerate(self.petri_net.transitions):
-            inputs = self.input_places[t_idx]
-            if not inputs:
-                rhs = 1
-            else:
-                rhs = 1
-                for p in inputs:
-                    if marking.get(p, 0) == 0:
-                        rhs = 0
-                        break
-
-            self.t_constraints[t].changeRHS(rhs)
-            if rhs == 1:
-                all_zero = False
-
-        if all_zero:
-            return True
-
-        self.ilp_model.solve(self.solver)
-        enabled_total = 0
-        for v in self.enabled_vars.values():
-            val = v.varValue
-            enabled_total += int(round(val)) if val is not None else 0
-
-        return enabled_total == 0
+    def _dead_rows(self, rows):
+        """Boolean mask of the rows (markings in place order) where no transition is enabled."""
+        return self.petri_net.disabled_transitions(rows).all(axis=1)
 
     def _build_dead_bdd(self):
         enabled_any = self.bdd.false
@@ -124,11 +97,7 @@ class ILP_BDD_Deadlock_Detection:
             and self.place_nums <= self.place_limit
             and self.transition_nums <= self.transition_limit
         ):
-            for state in self.bdd.pick_iter(states_bdd):
-                marking = self._state_to_marking(state)
-                if self._is_deadlock_ilp(marking):
-                    return marking, time.time() - start
-            return None, time.time() - start
+            return self._first_dead(states_bdd, start)
 
         dead_bdd = self._build_dead_bdd()
         candidate_bdd = states_bdd & dead_bdd
@@ -136,19 +105,258 @@ class ILP_BDD_Deadlock_Detection:
         if candidate_bdd == self.bdd.false:
             return None, time.time() - start
 
-        example = self.bdd.pick(candidate_bdd)
-        marking = self._state_to_marking(example)
-        if self._is_deadlock_ilp(marking):
-            return marking, time.time() - start
+        return self._first_dead(candidate_bdd, start)
+
+    def _first_dead(self, states_bdd, start):
+        for chunk in self.bdd_reach.iter_state_chunks(states_bdd):
+            dead = np.flatnonzero(self._dead_rows(chunk))
+            if len(dead):
+                return self.bdd_reach.marking_from_row(chunk[dead[0]]), time.time() - start
+        return None, time.time() - start
+
+    def _build_state_equation_model(self):
+        # M = M0 + C.sigma with M binary (1-safe) and every transition dead in M.
+        # The state equation over-approximates reachability, so an infeasible
+        # model proves there is no reachable deadlock.
+        net = self.petri_net
+        model = pulp.LpProblem("Deadlock_State_Equation", pulp.LpMinimize)
+        marking = [pulp.LpVariable(f"m_{p_idx}", cat="Binary") for p_idx in range(net.num_places)]
+        firing = [
+            pulp.LpVariable(f"sigma_{t_idx}", lowBound=0, cat="Integer")
+            for t_idx in range(net.num_transitions)
+        ]
+        # Incidence C = post - pre, one row per place, from the sparse arcs.
+        incidence = [{} for _ in range(net.num_places)]
+        for t_idx in range(net.num_transitions):
+            for p_idx in net.transition_outputs(t_idx):
+                incidence[p_idx][t_idx] = incidence[p_idx].get(t_idx, 0) + 1
+            for p_idx in net.transition_inputs(t_idx):
+                incidence[p_idx][t_idx] = incidence[p_idx].get(t_idx, 0) - 1
+
+        for p_idx in range(net.num_places):
+            flow = [
+                (firing[t_idx], weight)
+                for t_idx, weight in incidence[p_idx].items()
+                if weight != 0
+            ]
+            model += (
+                marking[p_idx] == int(net.initial_marking[p_idx]) + pulp.LpAffineExpression(flow),
+                f"state_eq_{p_idx}",
+            )
+
+        for t_idx in range(net.num_transitions):
+            inputs = net.transition_inputs(t_idx)
+            model += (
+                pulp.lpSum(marking[p_idx] for p_idx in inputs) <= len(inputs) - 1,
+                f"dead_{t_idx}",
+            )
+
+        # Pure feasibility: an objective on sigma makes CBC far slower at
+        # proving the refined model infeasible.
+        model += pulp.LpAffineExpression()
+        return model, marking
+
+    def _maximal_trap(self, mask):
+        # Largest Q within mask with Q* subset of *Q: drop any place that feeds a
+        # transition which puts no token back into the remaining set.
+        net = self.petri_net
+        # Transition of each pre arc, so arcs into non-refilling transitions are one mask.
+        arc_transitions = np.repeat(np.arange(net.num_transitions), self.input_counts)
+        trap = mask.astype(bool).copy()
+        while True:
+            refills = PetriNet.segment_any(trap[net.post_indices], net.post_indptr)
+            leaks = np.zeros(net.num_places, dtype=bool)
+            leaks[net.pre_indices[~refills[arc_transitions]]] = True
+            leaks &= trap
+            if not leaks.any():
+                return trap
+            trap &= ~leaks
+
+    def _marked_trap(self, mask):
+        # Shrink the maximal trap inside mask to a minimal one that is still
+        # initially marked: smaller traps give tighter cuts. None if there is none.
+        marked = self.petri_net.initial_marking > 0
+        trap = self._maximal_trap(mask)
+        if not marked[trap].any():
+            return None
+        for p_idx in np.flatnonzero(trap):
+            if not trap[p_idx]:
+                continue
+            without = trap.copy()
+            without[p_idx] = False
+            smaller = self._maximal_trap(without)
+            if marked[smaller].any():
+                trap = smaller
+        return trap
+
+    def iter_minimal_siphons(self, timeout=10.0):
+        """Yield the minimal siphons of the net as boolean place masks.
+
+        A siphon S satisfies *S within S*: each transition that puts a token
+        into S also takes one from S. The ILP picks a smallest siphon not
+        containing any siphon found so far, so every solution is minimal; the
+        cut sum(x_p for p in S) <= |S| - 1 then excludes S and its supersets.
+        Raises TimeoutError when the enumeration runs out of time.
+        """
+        start = time.time()
+        net = self.petri_net
+        model = pulp.LpProblem("Minimal_Siphons", pulp.LpMinimize)
+        x = [pulp.LpVariable(f"s_{p_idx}", cat="Binary") for p_idx in range(net.num_places)]
+
+        for t_idx in range(net.num_transitions):
+            inputs = net.transition_inputs(t_idx)
+            for p_idx in net.transition_outputs(t_idx):
+                model += x[p_idx] <= pulp.lpSum(x[q] for q in inputs)
+        model += pulp.lpSum(x) >= 1
+        model += pulp.lpSum(x)
+
+        found = 0
+        while True:
+            remaining = timeout - (time.time() - start)
+            if remaining <= 0:
+                raise TimeoutError
+            model.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=max(1, int(remaining))))
+            status = pulp.LpStatus[model.status]
+            if status == "Infeasible":
+                return
+            if status != "Optimal":
+                raise TimeoutError
+
+            siphon = np.array([round(v.varValue or 0) == 1 for v in x])
+            yield siphon
+            model += (
+                pulp.lpSum(x[i] for i in np.flatnonzero(siphon)) <= int(siphon.sum()) - 1,
+                f"cut_{found}",
+            )
+            found += 1
+
+    def check_siphon_trap(self, max_siphons=1000, timeout=10.0):
+        """Structural deadlock-freedom test on the pre/post matrices only.
+
+        In a dead marking every transition has an unmarked input place, so the
+        unmarked places form a siphon, and an initially marked trap never loses
+        all its tokens. Hence if every minimal siphon contains an initially
+        marked trap, no reachable marking is dead. Returns (deadlock_free,
+        siphon, seconds): siphon is the place list of a minimal siphon without
+        a marked trap, or None; (False, None) means the budget ran out. A net
+        without transitions is dead in its initial marking and gives
+        (False, []): the empty set is then a siphon.
+        """
+        start = time.time()
+        net = self.petri_net
 
-        for i, state in enumerate(self.bdd.pick_iter(candidate_bdd)):
-            if i >= 100:
+        if net.num_transitions == 0:
+            return False, [], time.time() - start
+        if not np.diff(net.pre_indptr).all():
+            # A transition without input places is always enabled.
+            return True, None, time.time() - start
+
+        marked = net.initial_marking > 0
+        try:
+            for count, siphon in enumerate(self.iter_minimal_siphons(timeout=timeout)):
+                if not marked[self._maximal_trap(siphon)].any():
+                    places = [net.places[i] for i in np.flatnonzero(siphon)]
+                    return False, places, time.time() - start
+                if count + 1 >= max_siphons:
+                    return False, None, time.time() - start
+        except TimeoutError:
+            return False, None, time.time() - start
+        return True, None, time.time() - start
+
+    def _confirm_reachable(self, marking, verify, timeout):
+        # True / False when the check is conclusive, None when it timed out.
+        if verify == "bdd":
+            states_bdd = self.bdd_reach._reachable_bdd
+            if states_bdd is None:
+                states_bdd, _, _ = self.bdd_reach.compute_reachable_states()
+            cube = self.bdd.cube({
+                self.bdd_reach._sanitize_name(p): bool(marking[i])
+                for i, p in enumerate(self.petri_net.places)
+            })
+            return (cube & states_bdd) != self.bdd.false
+
+        explicit = ExplicitTraverse(self.petri_net)
+        target = explicit.encode_marking(marking)
+        if self._explicit_reachable is not None:
+            return target in self._explicit_reachable
+
+        seen = set()
+        try:
+            for code in explicit.iter_reachable_markings(timeout=timeout, packed=True):
+                if code == target:
+                    return True
+                seen.add(code)
+        except TimeoutError:
+            return None
+        # Full traversal finished: later candidates are answered from the set.
+        self._explicit_reachable = seen
+        return False
+
+    def find_deadlock_state_equation(self, verify="bdd", max_candidates=50, timeout=60.0):
+        """Search for a deadlock with a MILP over the state equation.
+
+        Returns (marking, status, seconds). status is "deadlock_free" when the
+        MILP is infeasible (no reachable deadlock exists), "deadlock" when a
+        candidate was confirmed reachable by verify ("bdd" or "explicit"),
+        "candidate" when verify is None, and "unknown" when the candidate budget
+        or time ran out. Spurious candidates are excluded with a no-good cut and
+        the MILP is solved again.
+        """
+        start = time.time()
+
+        if verify not in ["bdd", "explicit", None]:
+            raise ValueError("Invalid verify. Use 'bdd', 'explicit' or None")
+
+        # A transition without input places is always enabled.
+        if not np.diff(self.petri_net.pre_indptr).all():
+            return None, "deadlock_free", time.time() - start
+
+        model, marking_vars = self._build_state_equation_model()
+        for attempt in range(max_candidates):
+            remaining = timeout - (time.time() - start)
+            if remaining <= 0:
                 break
-            m = self._state_to_marking(state)
-            if self._is_deadlock_ilp(m):
-                return m, time.time() - start
+            solver = pulp.PULP_CBC_CMD(msg=False, timeLimit=max(1, int(remaining)))
+            model.solve(solver)
 
-        return None, time.time() - start
+            status = pulp.LpStatus[model.status]
+            if status == "Infeasible":
+                return None, "deadlock_free", time.time() - start
+            if status != "Optimal":
+                break
+
+            candidate = np.array(
+                [int(round(v.varValue or 0)) for v in marking_vars], dtype=np.int8
+            )
+            result = {p: int(candidate[i]) for i, p in enumerate(self.petri_net.places)}
+            if verify is None:
+                return result, "candidate", time.time() - start
+
+            reachable = self._confirm_reachable(candidate, verify, timeout - (time.time() - start))
+            if reachable:
+                return result, "deadlock", time.time() - start
+            if reachable is None:
+                break
+
+            # An initially marked trap stays marked forever, so a candidate that
+            # empties one is spurious along with every marking that does.
+            trap = self._marked_trap(candidate == 0)
+            if trap is not None:
+                model += (
+                    pulp.lpSum(marking_vars[i] for i in np.flatnonzero(trap)) >= 1,
+                    f"trap_{attempt}",
+                )
+                continue
+
+            # No-good cut: the next candidate must differ in at least one place.
+            model += (
+                pulp.lpSum(1 - marking_vars[i] for i in np.flatnonzero(candidate == 1))
+                + pulp.lpSum(marking_vars[i] for i in np.flatnonzero(candidate == 0))
+                >= 1,
+                f"no_good_{attempt}",
+            )
+
+        return None, "unknown", time.time() - start
 
     def print_deadlock(self, deadlock):
         if deadlock is not None:
@@ -1,4 +1,5 @@
 import time
+import numpy as np
 from Task3_BDD.task3 import BDD_Reachability
 
 
@@ -11,9 +12,72 @@ class Optimization:
         self.petri_net = petri_net
         self.bdd = self.bdd_reachability.bdd
 
-    def optimize_reachable_marking(self, reachable_bdd, weights=None):
-        start_time = time.time()
+    def _max_weight_marking(self, reachable_bdd, weight_vector):
+        """Return (score, marking row) of the best state in reachable_bdd, or (None, None).
+
+        Longest path over the BDD DAG: every node keeps the best score over the
+        places at or below it and the branch that achieves it, so the cost is
+        linear in the number of BDD nodes. Places skipped by an edge are
+        don't-cares and take max(0, weight).
+        """
+        position, columns = self.bdd_reachability.state_positions()
+        num_places = len(columns)
+        weights = [int(weight_vector[c]) for c in columns]
+        gain_from = [0] * (num_places + 1)
+        for i in range(num_places - 1, -1, -1):
+            gain_from[i] = gain_from[i + 1] + max(0, weights[i])
+
+        def pos(node):
+            return num_places if node.var is None else position[node.var]
+
+        best = {}
+
+        def solve(node, parity):
+            # Complement edges are followed with a parity bit; TRUE is the
+            # regular constant.
+            if node.var is None:
+                return 0 if parity == node.negated else None
+            key = (node, parity)
+            if key not in best:
+                if node.var not in position:
+                    raise ValueError(f"BDD mentions non-state variable {node.var}")
+                i = pos(node)
+                child_parity = parity != node.negated
+                result = (None, None)
+                for value, child in enumerate((node.low, node.high)):
+                    sub = solve(child, child_parity)
+                    if sub is None:
+                        continue
+                    score = sub + gain_from[i + 1] - gain_from[pos(child)]
+                    score += weights[i] if value else 0
+                    if result[0] is None or score > result[0]:
+                        result = (score, value)
+                best[key] = result
+            return best[key][0]
+
+        try:
+            score = solve(reachable_bdd, False)
+            if score is None:
+                return None, None
+            score += gain_from[0] - gain_from[pos(reachable_bdd)]
 
+            row = np.array([int(w > 0) for w in weights], dtype=np.uint8)
+            node, parity = reachable_bdd, False
+            while node.var is not None:
+                i = pos(node)
+                value = best[(node, parity)][1]
+                row[i] = value
+                parity = parity != node.negated
+                node = node.high if value else node.low
+        finally:
+            # solve() is a self-referencing closure; drop the nodes it holds.
+            best.clear()
+
+        marking = np.empty(num_places, dtype=np.uint8)
+        marking[columns] = row
+        return score, marking
+
+    def _weight_vector(self, weights=None):
         if getattr(self.petri_net, "c", None) is not None:
             try:
                 weights = {
@@ -27,29 +91,43 @@ class Optimization:
             if weights is None:
                 weights = {p: 1 for p in self.petri_net.places}
 
-        final_weights = {}
-        for p in self.petri_net.places:
-            final_weights[p] = weights.get(p, 1)
+        return np.array(
+            [weights.get(p, 1) for p in self.petri_net.places], dtype=np.int64
+        )
+
+    def optimize_reachable_marking(self, reachable_bdd, weights=None, method="dp"):
+        """Return (best marking, score, seconds) over the reachable states.
+
+        method="dp" runs a max-weight path search over the BDD nodes;
+        method="enumerate" scores every state chunk by chunk.
+        """
+        start_time = time.time()
+
+        if method not in ["dp", "enumerate"]:
+            raise ValueError("Invalid method. Use 'dp' or 'enumerate'")
+
+        weight_vector = self._weight_vector(weights)
 
         max_score = -float("inf")
         best_marking = None
         found_any = False
 
         try:
-            for state in self.bdd.pick_iter(reachable_bdd):
-                found_any = True
-                current_score = 0
-                temp_marking = {}
+            if method == "dp":
+                score, row = self._max_weight_marking(reachable_bdd, weight_vector)
+                if score is not None:
+                    found_any = True
+                    max_score = score
+                    best_marking = self.bdd_reachability.marking_from_row(row)
+            else:
+                for chunk in self.bdd_reachability.iter_state_chunks(reachable_bdd):
+                    found_any = True
+                    scores = chunk @ weight_vector
+                    best = int(np.argmax(scores))
 
-                for p in self.petri_net.places:
-                    safe_p = self.bdd_reachability._sanitize_name(p)
-                    has_token = 1 if state.get(safe_p, False) else 0
-                    temp_marking[p] = has_token
-                    current_score += has_token * final_weights[p]
-
-                if current_score > max_score:
-                    max_score = current_score
-                    best_marking = temp_marking
+                    if scores[best] > max_score:
+                        max_score = int(scores[best])
+                        best_marking = self.bdd_reachability.marking_from_row(chunk[best])
 
         except Exception as e:
             print(f"Error during optimization: {e}")
@@ -64,60 +142,120 @@ class Optimization:
 
         return best_marking, max_score, duration
 
-    def optimize_with_constraints(self, reachable_bdd, weights=None, constraints=None):
-        start_time = time.time()
+    def _linear_constraint_bdd(self, coeffs, op, bound):
+        # Pseudo-Boolean constraint sum(coeffs[p] * p) op bound as a BDD, built
+        # top-down in variable order over the partial sum, cutting off to
+        # TRUE/FALSE as soon as the remaining places cannot change the outcome.
+        if op not in ["<=", ">=", "=="]:
+            raise ValueError("Invalid operator. Use '<=', '>=' or '=='")
+        if op == "==":
+            return self._linear_constraint_bdd(coeffs, "<=", bound) & self._linear_constraint_bdd(
+                coeffs, ">=", bound
+            )
+        if op == ">=":
+            coeffs = {p: -a for p, a in coeffs.items()}
+            bound = -bound
 
-        if getattr(self.petri_net, "c", None) is not None:
-            try:
-                weights = {
-                    p: int(self.petri_net.c[i])
-                    for i, p in enumerate(self.petri_net.places)
-                }
-            except Exception:
-                if weights is None:
-                    weights = {p: 1 for p in self.petri_net.places}
-        else:
-            if weights is None:
-                weights = {p: 1 for p in self.petri_net.places}
+        terms = {}
+        for p, a in coeffs.items():
+            if p not in self.petri_net.places:
+                raise ValueError(f"Unknown place in constraint: {p}")
+            if a:
+                terms[self.bdd_reachability._sanitize_name(p)] = int(a)
+        names = sorted(terms, key=self.bdd.level_of_var)
+        coefficients = [terms[v] for v in names]
 
-        if constraints is None:
-            constraints = {}
+        # Smallest and largest sum the places from position i on can still add.
+        low_rest = [0] * (len(names) + 1)
+        high_rest = [0] * (len(names) + 1)
+        for i in range(len(names) - 1, -1, -1):
+            low_rest[i] = low_rest[i + 1] + min(0, coefficients[i])
+            high_rest[i] = high_rest[i + 1] + max(0, coefficients[i])
 
-        final_weights = {}
-        for p in self.petri_net.places:
-            final_weights[p] = weights.get(p, 1)
+        memo = {}
 
-        max_score = -float("inf")
-        best_marking = None
-        found_any = False
+        def build(i, partial):
+            if partial + high_rest[i] <= bound:
+                return self.bdd.true
+            if partial + low_rest[i] > bound:
+                return self.bdd.false
+            key = (i, partial)
+            if key not in memo:
+                v = self.bdd.var(names[i])
+                high = build(i + 1, partial + coefficients[i])
+                low = build(i + 1, partial)
+                memo[key] = (v & high) | (~v & low)
+            return memo[key]
 
         try:
-            for state in self.bdd.pick_iter(reachable_bdd):
-                temp_marking = {}
-                valid = True
+            return build(0, 0)
+        finally:
+            # build() is a self-referencing closure that also keeps self (and so
+            # the manager) alive; drop the nodes it holds and break the cycle.
+            memo.clear()
+            build = None
+
+    def build_constraint_bdd(self, constraints=None, linear_constraints=None):
+        """Compile place constraints into a single BDD predicate over the state variables.
+
+        constraints maps a place to an inclusive (min, max) token range;
+        linear_constraints is a list of (coeffs, op, bound) with coeffs a dict
+        {place: int} and op one of '<=', '>=', '=='. For example
+        ({p: 1 for p in group}, "<=", k) means at most k places of group are marked.
+        """
+        result = self.bdd.true
+        for p, (min_val, max_val) in (constraints or {}).items():
+            if p not in self.petri_net.places:
+                continue
+            v = self.bdd.var(self.bdd_reachability._sanitize_name(p))
+            allowed = self.bdd.false
+            if min_val <= 0 <= max_val:
+                allowed |= ~v
+            if min_val <= 1 <= max_val:
+                allowed |= v
+            result &= allowed
+
+        for coeffs, op, bound in linear_constraints or []:
+            result &= self._linear_constraint_bdd(coeffs, op, bound)
+        return result
+
+    def optimize_with_constraints(
+        self, reachable_bdd, weights=None, constraints=None, linear_constraints=None, method="dp"
+    ):
+        """Optimize over the reachable states that satisfy the constraints.
 
-                for p in self.petri_net.places:
-                    safe_p = self.bdd_reachability._sanitize_name(p)
-                    has_token = 1 if state.get(safe_p, False) else 0
-                    temp_marking[p] = has_token
+        The constraints are compiled by build_constraint_bdd and conjoined with
+        reachable_bdd, and the optimizer then only searches that restricted set.
+        """
+        start_time = time.time()
+
+        if method not in ["dp", "enumerate"]:
+            raise ValueError("Invalid method. Use 'dp' or 'enumerate'")
 
-                    if p in constraints:
-                        min_val, max_val = constraints[p]
-                        if not (min_val <= has_token <= max_val):
-                            valid = False
-                            break
+        weight_vector = self._weight_vector(weights)
 
-                if not valid:
-                    continue
+        max_score = -float("inf")
+        best_marking = None
+        found_any = False
+
+        try:
+            restricted = reachable_bdd & self.build_constraint_bdd(constraints, linear_constraints)
 
-                found_any = True
-                current_score = sum(
-                    temp_marking[p] * final_weights[p] for p in self.petri_net.places
-                )
+            if method == "dp":
+                score, row = self._max_weight_marking(restricted, weight_vector)
+                if score is not None:
+                    found_any = True
+                    max_score = score
+                    best_marking = self.bdd_reachability.marking_from_row(row)
+            else:
+                for chunk in self.bdd_reachability.iter_state_chunks(restricted):
+                    found_any = True
+                    scores = chunk @ weight_vector
+                    best = int(np.argmax(scores))
 
-                if current_score > max_score:
-                    max_score = current_score
-                    best_marking = temp_marking
+                    if scores[best] > max_score:
+                        max_score = int(scores[best])
+                        best_marking = self.bdd_reachability.marking_from_row(chunk[best])
 
         except Exception as e:
             print(f"Error during constrained optimization: {e}")
@@ -131,3 +269,103 @@ class Optimization:
             return None, None, duration
 
         return best_marking, max_score, duration
+
+    @staticmethod
+    def _pareto_filter(rows, scores):
+        # Keep one marking per distinct score vector, earlier rows first.
+        _, first = np.unique(scores, axis=0, return_index=True)
+        first.sort()
+        rows, scores = rows[first], scores[first]
+
+        # In lexicographically descending order a vector can only be dominated
+        # by one that comes before it.
+        order = np.lexsort(-scores.T[::-1])
+        kept = np.empty_like(scores)
+        keep = []
+        for i in order:
+            if keep and np.all(kept[:len(keep)] >= scores[i], axis=1).any():
+                continue
+            kept[len(keep)] = scores[i]
+            keep.append(i)
+        return rows[keep], scores[keep]
+
+    @staticmethod
+    def _undominated(front_scores, scores):
+        # Indices of score rows that no front vector matches or beats in every
+        # objective. Front vectors with the largest sum go first, since they
+        # tend to eliminate the most rows.
+        alive = np.arange(len(scores))
+        for vector in front_scores[np.argsort(-front_scores.sum(axis=1))]:
+            alive = alive[(scores[alive] > vector).any(axis=1)]
+            if len(alive) == 0:
+                break
+        return alive
+
+    def _pareto_merge(self, front_rows, front_scores, rows, scores):
+        # The chunk's best marking for each objective and for their sum are
+        # non-dominated within it; folding them in first lets one vectorized
+        # dominance test discard most of the chunk.
+        seeds = np.unique(np.append(np.argmax(scores, axis=0), np.argmax(scores.sum(axis=1))))
+        front_rows, front_scores = self._pareto_filter(
+            np.concatenate([front_rows, rows[seeds]]),
+            np.concatenate([front_scores, scores[seeds]]),
+        )
+        survivors = self._undominated(front_scores, scores)
+        return self._pareto_filter(
+            np.concatenate([front_rows, rows[survivors]]),
+            np.concatenate([front_scores, scores[survivors]]),
+        )
+
+    def optimize_multi_objective(self, reachable_bdd, weight_matrix=None, k=1, chunk_size=1 << 16):
+        """Return (top_k, pareto, seconds) for several weight vectors in one pass.
+
+        weight_matrix has one row of place weights per objective (default: the
+        single vector from _weight_vector). The reachable states are decoded
+        chunk by chunk and every objective is scored at once with
+        chunk @ weight_matrix.T; only the current k best markings per objective
+        and the current non-dominated set are kept between chunks.
+
+        top_k[j] lists up to k (marking, scores) pairs, best first for objective
+        j; pareto lists the (marking, scores) pairs whose score vectors are not
+        dominated (all objectives maximized), one marking per score vector.
+        """
+        start_time = time.time()
+
+        if weight_matrix is None:
+            weight_matrix = [self._weight_vector()]
+        weight_matrix = np.asarray(weight_matrix, dtype=np.int64)
+        if weight_matrix.ndim != 2 or weight_matrix.shape[1] != self.petri_net.num_places:
+            raise ValueError("weight_matrix must have shape (num_objectives, num_places)")
+        if k < 1:
+            raise ValueError("k must be at least 1")
+
+        num_objectives = len(weight_matrix)
+        num_places = self.petri_net.num_places
+        empty_rows = np.empty((0, num_places), dtype=np.uint8)
+        empty_scores = np.empty((0, num_objectives), dtype=np.int64)
+        top_rows = [empty_rows] * num_objectives
+        top_scores = [empty_scores] * num_objectives
+        front_rows, front_scores = empty_rows, empty_scores
+
+        for chunk in self.bdd_reachability.iter_state_chunks(reachable_bdd, chunk_size=chunk_size):
+            scores = chunk @ weight_matrix.T
+            for j in range(num_objectives):
+                best = np.argpartition(-scores[:, j], min(k, len(chunk)) - 1)[:k]
+                rows = np.concatenate([top_rows[j], chunk[best]])
+                row_scores = np.concatenate([top_scores[j], scores[best]])
+                keep = np.argsort(-row_scores[:, j], kind="stable")[:k]
+                top_rows[j], top_scores[j] = rows[keep], row_scores[keep]
+            front_rows, front_scores = self._pareto_merge(front_rows, front_scores, chunk, scores)
+
+        if len(front_rows) == 0:
+            print("No reachable states found in the BDD!")
+
+        to_marking = self.bdd_reachability.marking_from_row
+        top_k = [
+            [(to_marking(row), tuple(int(v) for v in sc)) for row, sc in zip(top_rows[j], top_scores[j])]
+            for j in range(num_objectives)
+        ]
+        pareto = [
+            (to_marking(row), tuple(int(v) for v in sc)) for row, sc in zip(front_rows, front_scores)
+        ]
+        return top_k, pareto, time.time() - start_time
@@ -0,0 +1,392 @@
+import argparse
+import csv
+import glob
+import json
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from multiprocessing.connection import wait
+from Task1_Parser.task1 import PetriNet
+from Task2_Explicit.task2 import ExplicitTraverse
+from Task3_BDD.task3 import BDD_Reachability
+from Task4_Deadlock.task4 import ILP_BDD_Deadlock_Detection
+from Task5_Optimization.task5 import Optimization
+from Generators.net_generators import FAMILIES, expected_state_count, generate, write_pnml
+
+STAGES = ["explicit-bfs", "explicit-dfs", "bdd", "deadlock", "optimization"]
+RESULT_FIELDS = [
+    "net", "stage", "status", "states", "wall_time", "stage_time",
+    "peak_rss_mb", "peak_nodes", "detail", "error",
+]
+
+
+def compare_bdd_strategies(pnml_files, weight_file="Test_PNML_Files/weight.txt", backend="auto"):
+    """Run every BDD fixpoint strategy on each PNML file and print a comparison table."""
+    strategies = ["bfs", "chaining", "saturation"]
+    rows = []
+
+    print(f"{'Net':<20} {'Strategy':<12} {'States':<12} {'Time (s)':<12}")
+    print("-" * 56)
+    for pnml_file in pnml_files:
+        petri_net = PetriNet(pnml_file, weight_file)
+        net_name = os.path.splitext(os.path.basename(pnml_file))[0]
+
+        counts = set()
+        for strategy in strategies:
+            bdd_reach = BDD_Reachability(petri_net, backend=backend)
+            _, total_states, elapsed = bdd_reach.compute_reachable_states(strategy=strategy)
+            counts.add(total_states)
+            rows.append((net_name, strategy, total_states, elapsed))
+            print(f"{net_name:<20} {strategy:<12} {total_states:<12} {elapsed:<12.4f}")
+
+        if len(counts) != 1:
+            print(f"[Warning] Strategies disagree on {net_name}: {sorted(counts)}")
+    print("-" * 56)
+    return rows
+
+
+def compare_bdd_orderings(
+    pnml_files, weight_file="Test_PNML_Files/weight.txt", strategy="chaining", backend="auto"
+):
+    """Run every static variable ordering on each PNML file and log the peak BDD node count."""
+    orderings = ["file", "dfs", "force", "bandwidth"]
+    rows = []
+
+    print(f"{'Net':<20} {'Ordering':<12} {'States':<12} {'Time (s)':<12} {'Peak nodes':<12}")
+    print("-" * 68)
+    for pnml_file in pnml_files:
+        petri_net = PetriNet(pnml_file, weight_file)
+        net_name = os.path.splitext(os.path.basename(pnml_file))[0]
+
+        counts = set()
+        for ordering in orderings:
+            bdd_reach = BDD_Reachability(petri_net, ordering=ordering, backend=backend)
+            _, total_states, elapsed = bdd_reach.compute_reachable_states(strategy=strategy)
+            counts.add(total_states)
+            rows.append((net_name, ordering, total_states, elapsed, bdd_reach.peak_nodes))
+            print(
+                f"{net_name:<20} {ordering:<12} {total_states:<12} {elapsed:<12.4f} "
+                f"{bdd_reach.peak_nodes:<12}"
+            )
+
+        if len(counts) != 1:
+            print(f"[Warning] Orderings disagree on {net_name}: {sorted(counts)}")
+    print("-" * 68)
+    return rows
+
+
+def _run_stage(pnml_file, stage, weight_file, timeout, options):
+    petri_net = PetriNet(pnml_file, weight_file)
+    result = {}
+
+    if stage in ("explicit-bfs", "explicit-dfs"):
+        explicit = ExplicitTraverse(petri_net)
+        states, elapsed = explicit.compute_reachable_markings(
+            method=stage.split("-")[1], timeout=timeout, engine=options.get("engine", "numpy")
+        )
+        if states == -1:
+            return {"status": "timeout", "stage_time": elapsed}
+        if not len(states):
+            # compute_reachable_markings reports its own errors (including
+            # MemoryError under the cap) and returns no markings at all.
+            return {"status": "error", "error": "explicit traversal failed", "stage_time": elapsed}
+        return {"status": "ok", "states": len(states), "stage_time": elapsed}
+
+    bdd_reach = BDD_Reachability(
+        petri_net, ordering=options.get("ordering", "file"), backend=options.get("backend", "auto")
+    )
+    states_bdd, total_states, elapsed = bdd_reach.compute_reachable_states(
+        strategy=options.get("strategy", "bfs")
+    )
+    result.update(status="ok", states=total_states, stage_time=elapsed)
+
+    if stage == "deadlock":
+        detector = ILP_BDD_Deadlock_Detection(
+            petri_net, bdd_reach=bdd_reach, reachable_marking_nums=total_states
+        )
+        marking, elapsed = detector.find_deadlock(states_bdd)
+        result.update(stage_time=elapsed, detail="deadlock" if marking else "deadlock-free")
+    elif stage == "optimization":
+        optimizer = Optimization(petri_net, bdd_reach=bdd_reach)
+        _, score, elapsed = optimizer.optimize_reachable_marking(states_bdd)
+        result.update(stage_time=elapsed, detail=f"score={score}")
+
+    result["peak_nodes"] = bdd_reach.peak_nodes
+    return result
+
+
+def _benchmark_worker(conn, pnml_file, stage, weight_file, timeout, memory_mb, options):
+    if memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    # The job's own output is noise next to the table printed by the parent.
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+
+    try:
+        result = _run_stage(pnml_file, stage, weight_file, timeout, options)
+    except MemoryError:
+        result = {"status": "memory"}
+    except Exception as e:
+        result = {"status": "error", "error": str(e)}
+    # ru_maxrss is in kilobytes on Linux.
+    result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    conn.send(result)
+    conn.close()
+
+
+def run_benchmark_sweep(
+    pnml_files,
+    stages=None,
+    weight_file="Test_PNML_Files/weight.txt",
+    workers=None,
+    timeout=60.0,
+    memory_mb=None,
+    options=None,
+):
+    """Run every (net, stage) pair as its own process, at most workers at a time.
+
+    A job past its timeout is killed (status "timeout"), one that hits the
+    RLIMIT_AS cap of memory_mb reports "memory", and one that dies without a
+    result (e.g. a native allocation failure) reports "crashed". Returns a
+    list of result dicts with the keys in RESULT_FIELDS.
+    """
+    stages = stages or STAGES
+    options = options or {}
+    workers = workers or os.cpu_count() or 1
+    pending = [(pnml_file, stage) for pnml_file in pnml_files for stage in stages]
+    pending.reverse()
+    running = {}
+    results = []
+
+    print(f"{'Net':<20} {'Stage':<14} {'Status':<9} {'States':<12} {'Wall (s)':<10} {'RSS (MB)':<10} {'Peak nodes':<12}")
+    print("-" * 90)
+    while pending or running:
+        while pending and len(running) < workers:
+            pnml_file, stage = pending.pop()
+            parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(
+                target=_benchmark_worker,
+                args=(child_conn, pnml_file, stage, weight_file, timeout, memory_mb, options),
+            )
+            process.start()
+            child_conn.close()
+            running[process.sentinel] = (process, parent_conn, pnml_file, stage, time.time())
+
+        # The explicit engines stop at the timeout themselves; the kill is the
+        # backstop for stages that cannot be interrupted from inside.
+        wait(list(running), timeout=0.1)
+        now = time.time()
+        for sentinel, (process, conn, pnml_file, stage, started) in list(running.items()):
+            if process.is_alive() and now - started <= timeout + 1:
+                continue
+            if process.is_alive():
+                process.kill()
+                result = {"status": "timeout"}
+            else:
+                try:
+                    result = conn.recv()
+                except EOFError:
+                    result = {"status": "crashed", "error": f"exit code {process.exitcode}"}
+            process.join()
+            conn.close()
+            del running[sentinel]
+
+            row = dict.fromkeys(RESULT_FIELDS)
+            row.update(result, net=os.path.splitext(os.path.basename(pnml_file))[0], stage=stage)
+            row["wall_time"] = now - started
+            results.append(row)
+            print(
+                f"{row['net']:<20} {stage:<14} {row['status']:<9} {str(row['states']):<12} "
+                f"{row['wall_time']:<10.3f} {row['peak_rss_mb'] or 0:<10.1f} {str(row['peak_nodes']):<12}"
+            )
+    print("-" * 90)
+    results.sort(key=lambda row: (row["net"], STAGES.index(row["stage"])))
+    return results
+
+
+def write_results(results, json_file=None, csv_file=None):
+    if json_file:
+        with open(json_file, "w") as f:
+            json.dump(results, f, indent=2)
+    if csv_file:
+        with open(csv_file, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+
+
+def compare_with_baseline(results, baseline_file, tolerance=0.2, min_seconds=0.05):
+    """Print and return the jobs that regressed against a stored JSON run.
+
+    A job regresses when it no longer finishes with status "ok", reports a
+    different state count, or its wall time grows by more than tolerance
+    (relative) and min_seconds (absolute, to ignore timer noise).
+    """
+    with open(baseline_file, "r") as f:
+        baseline = {(row["net"], row["stage"]): row for row in json.load(f)}
+
+    regressions = []
+    for row in results:
+        old = baseline.get((row["net"], row["stage"]))
+        if old is None:
+            continue
+        reasons = []
+        if old["status"] == "ok" and row["status"] != "ok":
+            reasons.append(f"status {old['status']} -> {row['status']}")
+        if old["status"] == row["status"] == "ok" and old["states"] != row["states"]:
+            reasons.append(f"states {old['states']} -> {row['states']}")
+        if (
+            old["status"] == row["status"] == "ok"
+            and row["wall_time"] > old["wall_time"] * (1 + tolerance)
+            and row["wall_time"] - old["wall_time"] > min_seconds
+        ):
+            reasons.append(f"wall time {old['wall_time']:.3f}s -> {row['wall_time']:.3f}s")
+        if reasons:
+            regressions.append((row["net"], row["stage"], reasons))
+
+    if regressions:
+        print(f"[Warning] {len(regressions)} regression(s) against {baseline_file}:")
+        for net, stage, reasons in regressions:
+            print(f"  {net:<20} {stage:<14} {'; '.join(reasons)}")
+    else:
+        print(f"No regressions against {baseline_file}")
+    return regressions
+
+
+def run_scaling_benchmark(
+    family, sizes, workers=None, timeout=60.0, memory_mb=None, backend="auto", output_dir=None
+):
+    """Sweep explicit BFS and BDD reachability over one generated family for each N.
+
+    The nets are written as PNML to output_dir (a temporary directory by
+    default) and run through run_benchmark_sweep; state counts are checked
+    against the family's closed form. Returns one summary dict per N.
+    """
+    output_dir = output_dir or tempfile.mkdtemp(prefix=f"{family}_")
+    names = {}
+    for n in sizes:
+        pnml_file = os.path.join(output_dir, f"{family}_{n:04d}.pnml")
+        write_pnml(generate(family, n), pnml_file, net_id=f"{family}_{n}")
+        names[os.path.splitext(os.path.basename(pnml_file))[0]] = n
+
+    results = run_benchmark_sweep(
+        [os.path.join(output_dir, f"{name}.pnml") for name in names],
+        stages=["explicit-bfs", "bdd"],
+        workers=workers,
+        timeout=timeout,
+        memory_mb=memory_mb,
+        options={"backend": backend},
+    )
+    by_job = {(row["net"], row["stage"]): row for row in results}
+
+    rows = []
+    print(f"\n{'N':<6} {'Expected':<14} {'Explicit (s)':<14} {'BDD (s)':<12} {'BDD nodes':<12} {'Faster':<10}")
+    print("-" * 72)
+    for name, n in names.items():
+        expected = expected_state_count(family, n)
+        explicit, bdd = by_job[(name, "explicit-bfs")], by_job[(name, "bdd")]
+        for row in (explicit, bdd):
+            if row["status"] == "ok" and row["states"] != expected:
+                print(f"[Warning] {row['stage']} found {row['states']} states for N={n}, expected {expected}")
+
+        def cell(row):
+            return f"{row['stage_time']:.4f}" if row["status"] == "ok" else row["status"]
+
+        finished = [row for row in (explicit, bdd) if row["status"] == "ok"]
+        faster = min(finished, key=lambda row: row["stage_time"])["stage"] if finished else "-"
+        print(f"{n:<6} {expected:<14} {cell(explicit):<14} {cell(bdd):<12} {str(bdd['peak_nodes']):<12} {faster:<10}")
+        rows.append({"n": n, "expected": expected, "explicit": explicit, "bdd": bdd})
+    print("-" * 72)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare BDD reachability strategies or orderings across a directory of PNML files"
+    )
+    parser.add_argument(
+        "directory",
+        nargs="?",
+        default="Test_PNML_Files",
+        help="Directory containing .pnml files (default: Test_PNML_Files)",
+    )
+    parser.add_argument(
+        "--mode",
+        default="strategies",
+        choices=["strategies", "orderings", "sweep", "scaling"],
+        help="What to compare; sweep runs the parallel multi-stage harness, scaling runs "
+        "it over a generated family (default: strategies)",
+    )
+    parser.add_argument(
+        "--family",
+        default="philosophers",
+        choices=list(FAMILIES),
+        help="Generated net family for --mode scaling (default: philosophers)",
+    )
+    parser.add_argument(
+        "--sizes",
+        default="2,4,6,8,10,12",
+        help="Comma-separated values of N for --mode scaling (default: 2,4,6,8,10,12)",
+    )
+    parser.add_argument(
+        "--stages",
+        default=",".join(STAGES),
+        help=f"Comma-separated sweep stages out of {', '.join(STAGES)} (default: all)",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Concurrent sweep jobs (default: all cores)")
+    parser.add_argument("--job-timeout", type=float, default=60.0, help="Per-job time limit in seconds (default: 60)")
+    parser.add_argument("--memory-mb", type=int, default=None, help="Per-job address-space cap in MB (default: none)")
+    parser.add_argument("--json", default=None, help="Write sweep results to this JSON file")
+    parser.add_argument("--csv", default=None, help="Write sweep results to this CSV file")
+    parser.add_argument("--baseline", default=None, help="JSON results of an earlier sweep to check for regressions")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Relative wall-time slowdown flagged as a regression (default: 0.2)",
+    )
+    parser.add_argument(
+        "--backend",
+        default="auto",
+        choices=["auto", "cudd", "autoref"],
+        help="BDD package (default: cudd if available)",
+    )
+    args = parser.parse_args()
+    pnml_files = sorted(glob.glob(os.path.join(args.directory, "*.pnml")))
+    if args.mode == "scaling":
+        results = run_scaling_benchmark(
+            args.family,
+            [int(n) for n in args.sizes.split(",") if n.strip()],
+            workers=args.workers,
+            timeout=args.job_timeout,
+            memory_mb=args.memory_mb,
+            backend=args.backend,
+        )
+        rows = [row[stage] for row in results for stage in ("explicit", "bdd")]
+        write_results(rows, json_file=args.json, csv_file=args.csv)
+        if args.baseline and compare_with_baseline(rows, args.baseline, tolerance=args.tolerance):
+            raise SystemExit(1)
+    elif args.mode == "sweep":
+        stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+        invalid = [stage for stage in stages if stage not in STAGES]
+        if invalid:
+            raise ValueError(f"Invalid stage {invalid[0]}. Use {', '.join(STAGES)}")
+        results = run_benchmark_sweep(
+            pnml_files,
+            stages=stages,
+            workers=args.workers,
+            timeout=args.job_timeout,
+            memory_mb=args.memory_mb,
+            options={"backend": args.backend},
+        )
+        write_results(results, json_file=args.json, csv_file=args.csv)
+        if args.baseline and compare_with_baseline(results, args.baseline, tolerance=args.tolerance):
+            raise SystemExit(1)
+    elif args.mode == "orderings":
+        compare_bdd_orderings(pnml_files, backend=args.backend)
+    else:
+        compare_bdd_strategies(pnml_files, backend=args.backend)
@@ -9,6 +9,7 @@ from Task2_Explicit.task2 import ExplicitTraverse
 from Task3_BDD.task3 import BDD_Reachability
 from Task4_Deadlock.task4 import ILP_BDD_Deadlock_Detection
 from Task5_Optimization.task5 import Optimization
+from Telemetry.telemetry import Telemetry, peak_rss_mb
 
 
 class DualOutput:
@@ -46,7 +47,20 @@ def setup_output_folder():
         os.makedirs("bdd_visualizations")
 
 
-def main(pnml_file=None):
+def main(
+    pnml_file=None,
+    timeout=100.0,
+    engine="numpy",
+    workers=None,
+    strategy="bfs",
+    ordering="file",
+    reorder_threshold=None,
+    backend="auto",
+    cache_dir=None,
+    deadlock_method="bdd",
+    compiled=None,
+    telemetry_file=None,
+):
     if pnml_file is None:
         pnml_file = "Test_PNML_Files/config1.pnml"
     else:
@@ -79,26 +93,44 @@ def main(pnml_file=None):
     print("\n[TASK 1] PARSER - Reading PNML file")
     print("-" * 60)
 
-    petri_net = PetriNet(pnml_file, "Test_PNML_Files/weight.txt")
+    petri_net = None
+    if compiled and os.path.exists(compiled):
+        try:
+            petri_net = PetriNet.load_compiled(compiled, pnml_file, "Test_PNML_Files/weight.txt")
+            print(f"Loaded compiled net: {compiled}")
+        except ValueError as e:
+            print(f"[Error] {e}")
+    if petri_net is None:
+        petri_net = PetriNet(pnml_file, "Test_PNML_Files/weight.txt")
+        if compiled:
+            petri_net.save_compiled(compiled)
+            print(f"Saved compiled net: {compiled}")
 
     print(f"Places: {petri_net.places}")
     print(f"Transitions: {petri_net.transitions}")
     print(f"Number of places: {petri_net.num_places}")
     print(f"Number of transitions: {petri_net.num_transitions}")
     print(f"Initial marking: {petri_net.initial_marking}")
-    print(f"Pre-matrix shape: {petri_net.pre_matrix.shape}")
-    print(f"Post-matrix shape: {petri_net.post_matrix.shape}")
+    print(f"Pre-matrix shape: {(petri_net.num_places, petri_net.num_transitions)} ({len(petri_net.pre_indices)} arcs)")
+    print(f"Post-matrix shape: {(petri_net.num_places, petri_net.num_transitions)} ({len(petri_net.post_indices)} arcs)")
     print(f"Weight: {petri_net.c.tolist()}")
 
+    telemetry = None
+    if telemetry_file:
+        if os.path.exists(telemetry_file):
+            os.remove(telemetry_file)
+        telemetry = Telemetry(jsonl_file=telemetry_file)
+
     # =====================================================================
     # TASK 2: EXPLICIT TRAVERSE
     # =====================================================================
     print("\n[TASK 2] EXPLICIT TRAVERSE")
     print("-" * 60)
-    timeout = 100.0
     tracemalloc.start()
-    explicit = ExplicitTraverse(petri_net)
-    states_explicit, elapsed_time_explicit = explicit.compute_reachable_markings(method="bfs", timeout=timeout)
+    explicit = ExplicitTraverse(petri_net, telemetry=telemetry)
+    states_explicit, elapsed_time_explicit = explicit.compute_reachable_markings(
+        method="bfs", timeout=timeout, engine=engine, workers=workers
+    )
     current_task2, peak_task2 = tracemalloc.get_traced_memory()
     tracemalloc.stop()
     if (states_explicit == -1):
@@ -114,14 +146,31 @@ def main(pnml_file=None):
     print("-" * 60)
 
     tracemalloc.start()
-    bdd_reach = BDD_Reachability(petri_net)
-    states_bdd, total_states, elapsed_time = bdd_reach.compute_reachable_states()
+    bdd_reach = BDD_Reachability(
+        petri_net,
+        ordering=ordering,
+        reorder_threshold=reorder_threshold,
+        backend=backend,
+        cache_dir=cache_dir,
+        telemetry=telemetry,
+    )
+    states_bdd, total_states, elapsed_time = bdd_reach.compute_reachable_states(strategy=strategy)
     current_task3, peak_task3 = tracemalloc.get_traced_memory()
     tracemalloc.stop()
 
     print(f"Total reachable states: {total_states}")
     print(f"Execution time: {elapsed_time:.4f} seconds")
+    if bdd_reach.cache_hit:
+        print(f"  Loaded from cache: {cache_dir}")
+    print(f"  Relation construction: {bdd_reach.construction_time:.4f} seconds")
+    print(f"  Fixpoint iteration: {bdd_reach.fixpoint_time:.4f} seconds")
+    print(f"Peak BDD nodes ({ordering} ordering, {bdd_reach.bdd.name}): {bdd_reach.peak_nodes}")
     print(f"Peak memory: {peak_task3 / 1024 / 1024:.2f} MB")
+    # tracemalloc does not see the BDD node table, the process RSS does.
+    print(f"Live BDD nodes: {len(bdd_reach.bdd)}, peak RSS: {peak_rss_mb():.2f} MB")
+    if telemetry is not None:
+        telemetry.close()
+        print(f"Telemetry: {len(telemetry.records)} records written to {telemetry_file}")
     pnml_basename = os.path.splitext(os.path.basename(pnml_file))[0]
     bdd_reach.dump_bdd(f"bdd_visualizations/bdd_reachability_{pnml_basename}.dot", roots=[states_bdd])
 
@@ -135,7 +184,21 @@ def main(pnml_file=None):
         petri_net, bdd_reach=bdd_reach, reachable_marking_nums=total_states
     )
 
-    deadlock_marking, deadlock_time = deadlock_detector.find_deadlock(states_bdd)
+    deadlock_free = False
+    if deadlock_method == "siphon-trap":
+        deadlock_free, siphon, structural_time = deadlock_detector.check_siphon_trap()
+        print(f"Siphon/trap check time: {structural_time:.4f} seconds")
+
+    if deadlock_free:
+        print("Every minimal siphon contains an initially marked trap: deadlock-free")
+        deadlock_marking, deadlock_time = None, structural_time
+    elif deadlock_method == "state-equation":
+        deadlock_marking, status, deadlock_time = deadlock_detector.find_deadlock_state_equation(
+            verify="bdd", timeout=timeout
+        )
+        print(f"State-equation MILP result: {status}")
+    else:
+        deadlock_marking, deadlock_time = deadlock_detector.find_deadlock(states_bdd)
 
     if deadlock_marking:
         print(f"Deadlock found at marking: {deadlock_marking}")
@@ -168,7 +231,8 @@ def main(pnml_file=None):
         print(f"{'Explicit (BFS)':<20} {'Timeout':<12} {'-':<12} {peak_task2 / 1024 / 1024:<15.2f}")
     else:
         print(f"{'Explicit (BFS)':<20} {len(states_explicit):<12} {elapsed_time_explicit:<12.4f} {peak_task2 / 1024 / 1024:<15.2f}")
-    print(f"{'BDD':<20} {total_states:<12} {elapsed_time:<12.4f} {peak_task3 / 1024 / 1024:<15.2f}")
+    bdd_label = "BDD (cached)" if bdd_reach.cache_hit else "BDD"
+    print(f"{bdd_label:<20} {total_states:<12} {elapsed_time:<12.4f} {peak_task3 / 1024 / 1024:<15.2f}")
     print("-" * 60)
     
     if peak_task2 < peak_task3:
@@ -176,7 +240,10 @@ def main(pnml_file=None):
     else:
         print(f"\u2713 Lower memory: BDD ({peak_task3 / 1024 / 1024:.2f} MB)")
     
-    if elapsed_time_explicit < elapsed_time:
+    # A cache hit only measures loading the BDD from disk, not the traversal.
+    if bdd_reach.cache_hit:
+        print("Faster: not compared (BDD reachable set loaded from cache)")
+    elif elapsed_time_explicit < elapsed_time:
         print(f"\u2713 Faster: Explicit ({elapsed_time_explicit:.4f} s)")
     else:
         print(f"\u2713 Faster: BDD ({elapsed_time:.4f} s)")
@@ -205,5 +272,81 @@ if __name__ == "__main__":
         default=None,
         help="Path to PNML file to analyze (optional)",
     )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=100.0,
+        help="Time limit in seconds for the explicit traversal (default: 100)",
+    )
+    parser.add_argument(
+        "--engine",
+        default="numpy",
+        choices=["numpy", "bitmask", "incremental", "vectorized", "parallel"],
+        help="Explicit traversal engine (default: numpy)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for --engine parallel (default: all cores)",
+    )
+    parser.add_argument(
+        "--strategy",
+        default="bfs",
+        choices=["bfs", "chaining", "saturation"],
+        help="BDD reachability fixpoint strategy (default: bfs)",
+    )
+    parser.add_argument(
+        "--ordering",
+        default="file",
+        choices=["file", "dfs", "force", "bandwidth"],
+        help="Static BDD variable ordering heuristic (default: file)",
+    )
+    parser.add_argument(
+        "--reorder-threshold",
+        type=int,
+        default=None,
+        help="Sift the BDD variable order once the node count exceeds this (default: off)",
+    )
+    parser.add_argument(
+        "--backend",
+        default="auto",
+        choices=["auto", "cudd", "autoref"],
+        help="BDD package: native CUDD or pure-Python autoref (default: cudd if available)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory for cached relation/reachable-set BDDs, e.g. .bdd_cache (default: no cache)",
+    )
+    parser.add_argument(
+        "--deadlock-method",
+        default="bdd",
+        choices=["bdd", "state-equation", "siphon-trap"],
+        help="Deadlock search: scan the reachable BDD, solve the state-equation MILP, or run the siphon/trap check first (default: bdd)",
+    )
+    parser.add_argument(
+        "--compiled",
+        default=None,
+        help="Compiled net file: loaded instead of parsing when it matches the PNML, written otherwise",
+    )
+    parser.add_argument(
+        "--telemetry",
+        default=None,
+        help="Write per-iteration traversal records (frontier, BDD nodes, image time, RSS) as JSON lines",
+    )
     args = parser.parse_args()
-    main(args.pnml_file)
+    main(
+        args.pnml_file,
+        timeout=args.timeout,
+        engine=args.engine,
+        workers=args.workers,
+        strategy=args.strategy,
+        ordering=args.ordering,
+        reorder_threshold=args.reorder_threshold,
+        backend=args.backend,
+        cache_dir=args.cache_dir,
+        deadlock_method=args.deadlock_method,
+        compiled=args.compiled,
+        telemetry_file=args.telemetry,
+    )
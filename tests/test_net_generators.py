@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+from Generators.net_generators import FAMILIES, generate, write_pnml
+from Task1_Parser.task1 import PetriNet
+
+
+@pytest.mark.parametrize("family", sorted(FAMILIES))
+def test_write_pnml_round_trip(tmp_path, family):
+    net = generate(family, 3)
+    path = str(tmp_path / f"{family}.pnml")
+    write_pnml(net, path)
+    loaded = PetriNet(path)
+
+    assert loaded.places == net.places
+    assert loaded.transitions == net.transitions
+    assert np.array_equal(loaded.initial_marking, net.initial_marking)
+    assert np.array_equal(loaded.pre_matrix, net.pre_matrix)
+    assert np.array_equal(loaded.post_matrix, net.post_matrix)
+    assert np.array_equal(loaded.c, np.ones(net.num_places, dtype=int))
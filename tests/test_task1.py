@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from Generators.net_generators import generate
+from Task1_Parser.task1 import PetriNet
+
+
+@pytest.mark.parametrize("place_id_length", [1, 33, 200, 5000])
+def test_compiled_round_trip(tmp_path, place_id_length):
+    places = ["p" * place_id_length + str(i) for i in range(4)]
+    net = PetriNet.from_structure(
+        places, ["t0", "t1"],
+        [(places[0], "t0"), ("t0", places[1]), (places[1], "t1"), ("t1", places[2]), ("t1", places[3])],
+        {places[0], places[3]},
+    )
+    path = str(tmp_path / "net.pnetc")
+    net.save_compiled(path)
+    loaded = PetriNet.load_compiled(path)
+
+    assert loaded.places == net.places
+    assert loaded.transitions == net.transitions
+    for name in ("initial_marking", "c", "pre_indptr", "pre_indices", "post_indptr", "post_indices"):
+        assert np.array_equal(getattr(loaded, name), getattr(net, name)), name
+    assert np.array_equal(loaded.pre_matrix, net.pre_matrix)
+    assert np.array_equal(loaded.post_matrix, net.post_matrix)
+
+
+def test_compiled_round_trip_generated(tmp_path):
+    net = generate("philosophers", 6)
+    path = str(tmp_path / "philosophers.pnetc")
+    net.save_compiled(path)
+    loaded = PetriNet.load_compiled(path)
+    assert np.array_equal(loaded.initial_marking, net.initial_marking)
+    assert np.array_equal(loaded.pre_matrix, net.pre_matrix)
+    assert np.array_equal(loaded.post_matrix, net.post_matrix)
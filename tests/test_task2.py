@@ -0,0 +1,71 @@
+import pytest
+from Generators.net_generators import generate
+from Task1_Parser.task1 import PetriNet
+from Task2_Explicit.task2 import DiskVisitedSet, ExplicitTraverse
+
+
+@pytest.mark.parametrize("family, n", [("philosophers", 4), ("token_ring", 4), ("mutex", 5)])
+def test_parallel_matches_bitmask(family, n):
+    explicit = ExplicitTraverse(generate(family, n))
+    expected, _ = explicit.compute_reachable_markings("bfs", timeout=60, engine="bitmask")
+
+    for workers in (2, 3, 4, 2, 3, 4, 8, 8):
+        markings, _ = explicit.compute_reachable_markings(
+            "bfs", timeout=60, engine="parallel", workers=workers
+        )
+        assert sorted(markings) == sorted(expected)
+
+
+def test_disk_visited_set_rounds_capacity():
+    visited = DiskVisitedSet(40, capacity=1000)
+    try:
+        assert visited.capacity == 1024
+        for code in range(3000):
+            assert visited.add(code)
+        assert not visited.add(7)
+        assert len(visited) == 3000
+        assert 2999 in visited and 5000 not in visited
+    finally:
+        visited.close()
+
+
+def test_bitstate_search_wide_markings():
+    # Markings 1 << 0 and 1 << 61 are congruent modulo 2**61 - 1.
+    places = [f"p{i}" for i in range(62)]
+    net = PetriNet.from_structure(places, ["t"], [("p0", "t"), ("t", "p61")], {"p0"})
+    explicit = ExplicitTraverse(net)
+
+    result = explicit.bitstate_search(num_bits=1 << 16)
+    assert result["states"] == 2
+    assert result["deadlocks"] == [1 << 61]
+
+
+def test_iter_reachable_markings_validates_eagerly():
+    explicit = ExplicitTraverse(generate("mutex", 2))
+    with pytest.raises(ValueError, match="Invalid method"):
+        explicit.iter_reachable_markings(method="astar")
+
+
+def test_marking_apis_report_unsafe_nets():
+    net = PetriNet.from_structure(["a", "b"], ["t"], [("a", "t"), ("t", "b")], {"a", "b"})
+    explicit = ExplicitTraverse(net)
+    with pytest.raises(ValueError, match=r"compute_reachable_markings\(engine='numpy'\)"):
+        list(explicit.iter_reachable_markings())
+    with pytest.raises(ValueError, match=r"compute_reachable_markings\(engine='numpy'\)"):
+        explicit.bitstate_search()
+
+
+@pytest.mark.parametrize("n", [2, 3, 4, 5, 6])
+@pytest.mark.parametrize("method", ["bfs", "dfs"])
+def test_stubborn_reduction_preserves_deadlocks(n, method):
+    report = ExplicitTraverse(generate("philosophers", n)).compare_reduction(method, timeout=60)
+    assert report["deadlocks_preserved"] is True
+    assert report["full_deadlocks"] == 1
+    assert report["reduced_states"] <= report["full_states"]
+
+
+@pytest.mark.parametrize("family", ["token_ring", "readers_writers", "mutex"])
+def test_stubborn_reduction_on_deadlock_free_nets(family):
+    report = ExplicitTraverse(generate(family, 4)).compare_reduction(timeout=60)
+    assert report["deadlocks_preserved"] is True
+    assert report["reduced_deadlocks"] == report["full_deadlocks"] == 0
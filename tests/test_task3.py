@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from Generators.net_generators import generate
+from Task1_Parser.task1 import PetriNet
+from Task2_Explicit.task2 import ExplicitTraverse
+from Task3_BDD.task3 import BDD_Reachability
+
+NETS = [
+    ("philosophers", 4),
+    ("token_ring", 3),
+    ("readers_writers", 3),
+    ("mutex", 4),
+    ("Test_PNML_Files/config7.pnml", None),
+]
+
+
+def load_net(name, n):
+    if n is None:
+        return PetriNet(name, "Test_PNML_Files/weight.txt")
+    return generate(name, n)
+
+
+def bitmask_states(petri_net):
+    markings, _ = ExplicitTraverse(petri_net).compute_reachable_markings("bfs", engine="bitmask")
+    return set(markings)
+
+
+def row_codes(explicit, rows):
+    return [explicit.encode_marking(row) for row in rows]
+
+
+@pytest.mark.parametrize("name, n", NETS)
+@pytest.mark.parametrize("ordering", ["dfs", "force", "bandwidth"])
+def test_state_chunks_match_bitmask_bfs(name, n, ordering):
+    net = load_net(name, n)
+    expected = bitmask_states(net)
+    explicit = ExplicitTraverse(net)
+    bdd_reach = BDD_Reachability(net, ordering=ordering)
+    states_bdd, total_states, _ = bdd_reach.compute_reachable_states()
+    assert total_states == len(expected)
+
+    # Small chunks and blocks exercise both the path walk and the block expansion.
+    for chunk_size, block_limit in [(1 << 16, 1 << 12), (7, 2)]:
+        codes = []
+        for chunk in bdd_reach.iter_state_chunks(states_bdd, chunk_size, block_limit=block_limit):
+            assert chunk.shape[1] == net.num_places and len(chunk) <= chunk_size
+            codes += row_codes(explicit, chunk)
+        assert len(codes) == len(expected)
+        assert set(codes) == expected
+
+        codes = []
+        for chunk in bdd_reach.iter_state_chunks(
+            states_bdd, chunk_size, packed=True, block_limit=block_limit
+        ):
+            rows = np.unpackbits(chunk, axis=1, count=net.num_places)
+            codes += row_codes(explicit, rows)
+        assert set(codes) == expected and len(codes) == len(expected)
@@ -0,0 +1,22 @@
+from Generators.net_generators import generate
+from Task1_Parser.task1 import PetriNet
+from Task3_BDD.task3 import BDD_Reachability
+from Task4_Deadlock.task4 import ILP_BDD_Deadlock_Detection
+
+
+def _detector(petri_net):
+    return ILP_BDD_Deadlock_Detection(petri_net, bdd_reach=BDD_Reachability(petri_net))
+
+
+def test_siphon_trap_without_transitions():
+    net = PetriNet.from_structure(["a", "b"], [], [], {"a"})
+    deadlock_free, siphon, _ = _detector(net).check_siphon_trap()
+    assert deadlock_free is False
+    assert siphon == []
+
+
+def test_siphon_trap_results():
+    assert _detector(generate("mutex", 3)).check_siphon_trap()[0] is True
+    deadlock_free, siphon, _ = _detector(generate("philosophers", 3)).check_siphon_trap()
+    assert deadlock_free is False
+    assert siphon
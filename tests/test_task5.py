@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from Generators.net_generators import generate
+from Task2_Explicit.task2 import ExplicitTraverse
+from Task3_BDD.task3 import BDD_Reachability
+from Task5_Optimization.task5 import Optimization
+
+NETS = [("philosophers", 4), ("token_ring", 3), ("readers_writers", 3), ("mutex", 4)]
+
+
+def reachable_rows(petri_net):
+    explicit = ExplicitTraverse(petri_net)
+    markings, _ = explicit.compute_reachable_markings("bfs", engine="bitmask")
+    return np.array([explicit.decode_marking(m) for m in markings], dtype=np.int64)
+
+
+def setup(family, n, ordering):
+    net = generate(family, n)
+    bdd_reach = BDD_Reachability(net, ordering=ordering)
+    states_bdd, _, _ = bdd_reach.compute_reachable_states()
+    return net, Optimization(net, bdd_reach=bdd_reach), states_bdd
+
+
+def as_row(net, marking):
+    return np.array([marking[p] for p in net.places], dtype=np.int64)
+
+
+@pytest.mark.parametrize("family, n", NETS)
+@pytest.mark.parametrize("ordering", ["file", "force"])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_dp_matches_enumerate_with_signed_weights(family, n, ordering, seed):
+    net, optimizer, states_bdd = setup(family, n, ordering)
+    net.c = np.random.default_rng(seed).integers(-5, 6, net.num_places)
+    rows = reachable_rows(net)
+    expected = int((rows @ net.c).max())
+
+    for method in ["dp", "enumerate"]:
+        marking, score, _ = optimizer.optimize_reachable_marking(states_bdd, method=method)
+        assert score == expected
+        row = as_row(net, marking)
+        assert int(row @ net.c) == expected
+        assert (rows == row).all(axis=1).any()
+
+
+def brute_force_front(scores):
+    vectors = {tuple(int(v) for v in row) for row in scores}
+    return {
+        a for a in vectors
+        if not any(b != a and all(y >= x for x, y in zip(a, b)) for b in vectors)
+    }
+
+
+@pytest.mark.parametrize("family, n", NETS)
+@pytest.mark.parametrize("k", [1, 3])
+@pytest.mark.parametrize("chunk_size", [1 << 16, 5])
+def test_multi_objective_matches_brute_force(family, n, k, chunk_size):
+    net, optimizer, states_bdd = setup(family, n, "bandwidth")
+    weight_matrix = np.random.default_rng(k).integers(-4, 5, (3, net.num_places))
+    rows = reachable_rows(net)
+    scores = rows @ weight_matrix.T
+
+    top_k, pareto, _ = optimizer.optimize_multi_objective(
+        states_bdd, weight_matrix, k=k, chunk_size=chunk_size
+    )
+
+    reachable = {tuple(row) for row in rows}
+    for j in range(len(weight_matrix)):
+        expected = sorted(scores[:, j], reverse=True)[:k]
+        assert [sc[j] for _, sc in top_k[j]] == expected
+        for marking, sc in top_k[j]:
+            row = as_row(net, marking)
+            assert tuple(row) in reachable
+            assert sc == tuple(int(v) for v in weight_matrix @ row)
+
+    assert {sc for _, sc in pareto} == brute_force_front(scores)
+    assert len(pareto) == len(brute_force_front(scores))
+    for marking, sc in pareto:
+        row = as_row(net, marking)
+        assert tuple(row) in reachable
+        assert sc == tuple(int(v) for v in weight_matrix @ row)